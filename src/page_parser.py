@@ -17,11 +17,9 @@ Notes:
 
 from pathlib import Path
 import base64
-from io import BytesIO
 from typing import List
 import uuid
 
-from PIL import Image
 import pymupdf
 
 from ...config import logger, azure_openai_client
@@ -166,11 +164,9 @@ def parse_pdf_page_by_page(
         page_pdf = full_pdf.load_page(page_num)
 
         # Convert the page to a high-resolution image for better OCR results.
+        # The Pixmap already encodes to PNG; no need to round-trip through Pillow.
         pix = page_pdf.get_pixmap(dpi=150)
-        image = Image.open(BytesIO(pix.tobytes()))
-        buffered = BytesIO()
-        image.save(buffered, format="PNG")
-        image_b64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+        image_b64 = base64.b64encode(pix.tobytes("png")).decode("utf-8")
 
         # Send the page image to the LLM for parsing.
         try:
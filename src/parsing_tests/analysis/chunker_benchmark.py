@@ -0,0 +1,70 @@
+"""
+Micro-benchmark for clause_chunker on synthetic units.
+
+Chunks doubling input sizes up to ``--units`` and reports the time per unit,
+which stays flat when chunking scales linearly. A large ``--chunk-chars``
+packs thousands of small units into each chunk (the Sherpa worst case).
+
+Example:
+    uv run python -m parsing_tests.analysis.chunker_benchmark --units 100000
+    uv run python -m parsing_tests.analysis.chunker_benchmark --chunk-chars 1200 --chunk-chars 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import List
+
+from .clause_chunker import build_clauses, chunk_clause
+from .payload_reader import SourceUnit
+
+WORDS = ("contract", "party", "shall", "works", "payment", "notice", "period", "the", "of", "and")
+
+
+def synthetic_units(count: int, clause_units: int, seed: int = 0) -> List[SourceUnit]:
+    """``count`` short units with a numbered heading every ``clause_units`` units."""
+    rng = random.Random(seed)
+    units: List[SourceUnit] = []
+    for index in range(count):
+        if index % clause_units == 0:
+            text = f"{index // clause_units + 1}.1 Clause heading"
+        else:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        units.append(SourceUnit(unit_id=index, page=index // 50 + 1, text=text))
+    return units
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark clause-aware chunking.")
+    parser.add_argument("--units", type=int, default=100_000, help="Largest input size.")
+    parser.add_argument("--steps", type=int, default=4, help="Number of doubling sizes to run.")
+    parser.add_argument("--clause-units", type=int, default=5000, help="Units per clause.")
+    parser.add_argument(
+        "--chunk-chars",
+        type=int,
+        action="append",
+        help="Chunk limit to benchmark; repeatable (default: 1200 and 500000).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the best is kept.")
+    args = parser.parse_args()
+
+    sizes = [max(1, args.units >> shift) for shift in reversed(range(args.steps))]
+    print(f"{'chunk chars':>11} {'units':>8} {'chunks':>7} {'seconds':>8} {'us/unit':>8}")
+    for chunk_chars in args.chunk_chars or [1200, 500_000]:
+        for size in sizes:
+            clauses = build_clauses(synthetic_units(size, args.clause_units))
+            best = float("inf")
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                chunk_count = sum(len(chunk_clause(clause, chunk_chars)) for clause in clauses)
+                best = min(best, time.perf_counter() - started)
+            print(
+                f"{chunk_chars:>11} {size:>8} {chunk_count:>7} {best:>8.3f} "
+                f"{best / size * 1e6:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,33 @@ from __future__ import annotations
 import argparse
 import json
 import math
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence
+from typing import Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from ..utils.payload_store import PAYLOAD_EXTENSIONS, UNITS_TABLE_SUFFIX
+from .payload_reader import PARSER_ALIASES, SourceUnit, detect_parser, iter_units
+from .tokenizers import Tokenizer, count_tokens, get_tokenizer
 
 HEADING_REGEXES = [
     re.compile(r"^\s*(\d+(?:\.\d+)+)\s+(.*)"),  # e.g., 12.2.2 Title
     re.compile(r"^\s*(ARTICLE\s+\d+(?:\.\d+)*)(?:\s*[-:])?\s+(.*)", re.IGNORECASE),
 ]
+# Cut points for oversized units, best first; each matches the separator to cut after.
+SPLIT_BOUNDARIES = [
+    re.compile(r"\n\s*\n"),  # paragraph break
+    re.compile(r"(?<=[.!?;:])\s+"),  # sentence end
+    re.compile(r"\n"),
+    re.compile(r"\s+"),
+]
+WORD_BREAK = re.compile(r"\s+")
 
 
-@dataclass
-class SourceUnit:
-    unit_id: int
-    page: int
-    text: str
-
-
-@dataclass
+@dataclass(slots=True)
 class Clause:
     clause_id: str
     title: str
@@ -35,33 +43,6 @@ class Clause:
         return sorted({unit.page for unit in self.units if unit.page >= 0})
 
 
-def iter_docling_units(path: Path) -> Iterable[SourceUnit]:
-    content = json.loads(path.read_text(encoding="utf-8"))["result"]["content"]
-    for chunk in content:
-        text = chunk.get("chunk_content", "").strip()
-        if not text:
-            continue
-        yield SourceUnit(
-            unit_id=chunk.get("chunk_id", -1),
-            page=chunk.get("chunk_page", -1),
-            text=text,
-        )
-
-
-def iter_sherpa_units(path: Path) -> Iterable[SourceUnit]:
-    blocks = json.loads(path.read_text(encoding="utf-8"))["return_dict"]["result"]["blocks"]
-    for block in blocks:
-        sentences = block.get("sentences") or []
-        text = " ".join(sentence.strip() for sentence in sentences).strip()
-        if not text:
-            continue
-        yield SourceUnit(
-            unit_id=block.get("block_idx", -1),
-            page=1 + block.get("page_idx", -1),
-            text=text,
-        )
-
-
 def extract_heading(text: str) -> Optional[tuple[str, str]]:
     first_line = text.splitlines()[0].strip()
     for regex in HEADING_REGEXES:
@@ -90,80 +71,404 @@ def build_clauses(units: Iterable[SourceUnit]) -> List[Clause]:
     return clauses
 
 
-def chunk_clause(clause: Clause, chunk_char_limit: int) -> List[dict]:
+def split_spans(
+    text: str,
+    max_chars: int,
+    overlap_chars: int = 0,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[tuple[int, int]]:
+    """
+    ``(start, end)`` offsets of pieces of ``text[start:end]`` no longer than ``max_chars``.
+
+    Pieces end at the best boundary in the second half of the window (paragraph,
+    then sentence, then line, then word). The next piece starts at the first word
+    boundary within ``overlap_chars`` before the cut, so the overlap is at most
+    ``overlap_chars``. The text is only scanned, never copied.
+    """
+    max_chars = max(1, max_chars)
+    overlap_chars = min(max(0, overlap_chars), max_chars // 2)
+    length = len(text) if end is None else end
+    while start < length:
+        if length - start <= max_chars:
+            yield start, length
+            return
+        window_end = start + max_chars
+        cut = window_end
+        for boundary in SPLIT_BOUNDARIES:
+            last = None
+            for last in boundary.finditer(text, start + max_chars // 2, window_end):
+                pass
+            if last is not None:
+                cut = last.end()
+                break
+        yield start, cut
+        next_start = cut
+        if overlap_chars:
+            next_start = cut - overlap_chars
+            word_break = WORD_BREAK.search(text, next_start, cut)
+            if word_break is not None:
+                next_start = word_break.end()
+        while next_start < length and text[next_start].isspace():
+            next_start += 1
+        start = next_start
+
+
+def chunk_clause(
+    clause: Clause,
+    chunk_char_limit: int,
+    sizes: Optional[Mapping[str, int]] = None,
+    overlap: int = 0,
+    tokenizer: Optional[Tokenizer] = None,
+) -> List[dict]:
+    """
+    Pack the clause's units into chunks of at most ``chunk_char_limit``.
+
+    With ``sizes`` (token count per stripped unit text) the limit is a token
+    budget instead of a character count; unit separators count as one token.
+    Units larger than the limit are split by ``split_spans`` into pieces that
+    overlap by ``overlap`` (same unit as the limit); each piece becomes its own
+    chunk with the unit's id and page and its ``unit_span`` character offsets.
+    In token mode the pieces are counted with ``tokenizer`` and re-split until
+    each fits the budget.
+    """
     chunks: List[dict] = []
     buffer: List[str] = []
     unit_ids: List[int] = []
-    pages: List[int] = []
+    pages: set[int] = set()
+    # Size of "\n".join(buffer), kept up to date instead of re-summing the buffer.
+    buffer_length = 0
     chunk_index = 0
 
+    def emit(text: str, ids: List[int], chunk_pages: Iterable[int], size: int) -> dict:
+        nonlocal chunk_index
+        chunk_index += 1
+        chunk = {
+            "clause_id": clause.clause_id,
+            "clause_title": clause.title,
+            "chunk_index": chunk_index,
+            "text": text,
+            "unit_ids": ids,
+            "pages": sorted(page for page in chunk_pages if page >= 0),
+        }
+        if sizes is not None:
+            chunk["token_count"] = size
+        chunks.append(chunk)
+        return chunk
+
     def flush() -> None:
-        nonlocal buffer, unit_ids, pages, chunk_index
+        nonlocal buffer, unit_ids, pages, buffer_length
         if not buffer:
             return
-        chunk_index += 1
-        text = "\n".join(buffer).strip()
-        chunks.append(
-            {
-                "clause_id": clause.clause_id,
-                "clause_title": clause.title,
-                "chunk_index": chunk_index,
-                "text": text,
-                "unit_ids": unit_ids[:],
-                "pages": sorted({page for page in pages if page >= 0}),
-            }
-        )
+        emit("\n".join(buffer).strip(), unit_ids, pages, buffer_length)
         buffer = []
         unit_ids = []
-        pages = []
+        pages = set()
+        buffer_length = 0
 
     for unit in clause.units:
         unit_text = unit.text.strip()
         if not unit_text:
             continue
+        unit_size = sizes[unit_text] if sizes is not None else len(unit_text)
+        if unit_size > chunk_char_limit:
+            flush()
+            if sizes is None:
+                spans = (
+                    (start, end, end - start)
+                    for start, end in split_spans(unit_text, chunk_char_limit, overlap)
+                )
+            else:
+                spans = _token_spans(unit_text, unit_size, chunk_char_limit, overlap, tokenizer)
+            for start, end, size in spans:
+                piece = emit(unit_text[start:end].strip(), [unit.unit_id], [unit.page], size)
+                piece["unit_span"] = [start, end]
+            continue
         # Start a new chunk if the buffer would exceed the limit.
-        prospective_length = sum(len(part) for part in buffer) + len(buffer) + len(unit_text)
-        if buffer and prospective_length > chunk_char_limit:
+        if buffer and buffer_length + 1 + unit_size > chunk_char_limit:
             flush()
+        buffer_length += unit_size + (1 if buffer else 0)
         buffer.append(unit_text)
         unit_ids.append(unit.unit_id)
-        pages.append(unit.page)
-        # Handle extremely large single units by flushing immediately.
-        if len(unit_text) >= chunk_char_limit:
+        pages.add(unit.page)
+        # A unit that fills the chunk on its own is flushed immediately.
+        if unit_size == chunk_char_limit:
             flush()
 
     flush()
     return chunks
 
 
-def chunk_document(units: Iterable[SourceUnit], chunk_char_limit: int) -> List[dict]:
+def _token_spans(
+    text: str,
+    text_tokens: int,
+    token_limit: int,
+    overlap: int,
+    tokenizer: Optional[Tokenizer],
+) -> Iterator[tuple[int, int, int]]:
+    """
+    ``(start, end, tokens)`` of pieces of ``text`` that fit ``token_limit``.
+
+    Windows are sized at the text's average chars-per-token ratio, then every
+    piece is counted with ``tokenizer``; a piece over budget (dense numbers,
+    tables) is split again at its own, denser ratio.
+    """
+    if tokenizer is None:
+        raise ValueError("Splitting by a token budget needs the tokenizer that counted the units")
+
+    def fit(start: int, end: int, chars_per_token: float) -> Iterator[tuple[int, int, int]]:
+        max_chars = max(1, int(token_limit * chars_per_token))
+        overlap_chars = int(overlap * chars_per_token)
+        spans = list(split_spans(text, max_chars, overlap_chars, start, end))
+        counts = tokenizer.count_batch(
+            [text[piece_start:piece_end].strip() for piece_start, piece_end in spans]
+        )
+        for (piece_start, piece_end), tokens in zip(spans, counts):
+            width = piece_end - piece_start
+            if tokens <= token_limit or width <= 1:
+                yield piece_start, piece_end, tokens
+                continue
+            # Aim a little under the budget so the next pass rarely needs another.
+            denser = min(width * token_limit / tokens * 0.9, width - 1) / token_limit
+            yield from fit(piece_start, piece_end, denser)
+
+    yield from fit(0, len(text), len(text) / max(1, text_tokens))
+
+
+def chunk_document(
+    units: Iterable[SourceUnit],
+    chunk_char_limit: int,
+    tokenizer: Optional[Tokenizer] = None,
+    overlap: int = 0,
+) -> List[dict]:
+    """Clause-aware chunks; with a ``tokenizer``, ``chunk_char_limit`` and ``overlap`` are in tokens."""
     clauses = build_clauses(units)
+    sizes = None
+    if tokenizer is not None:
+        # One batch for the whole document; repeated texts are counted once.
+        sizes = count_tokens(
+            tokenizer, (unit.text.strip() for clause in clauses for unit in clause.units)
+        )
     chunks: List[dict] = []
     for clause in clauses:
-        clause_chunks = chunk_clause(clause, chunk_char_limit)
+        clause_chunks = chunk_clause(clause, chunk_char_limit, sizes, overlap, tokenizer)
         chunks.extend(clause_chunks)
     return chunks
 
 
+CHUNKS_SUFFIX = ".chunks.json"
+
+
+@dataclass(frozen=True)
+class ChunkOptions:
+    chunk_chars: int = 1200
+    chunk_tokens: Optional[int] = None
+    tokenizer: str = "chars"
+    overlap: int = 0
+
+
+@lru_cache(maxsize=None)
+def _tokenizer(spec: str) -> Tokenizer:
+    return get_tokenizer(spec)
+
+
+def chunk_file(path: Path, parser: str, options: ChunkOptions) -> dict:
+    """The clause_chunker output document for one payload."""
+    units = iter_units(path, parser)
+    output = {"source": str(path), "parser": parser}
+    if options.chunk_tokens:
+        tokenizer = _tokenizer(options.tokenizer)
+        chunks = chunk_document(
+            units,
+            chunk_char_limit=max(16, options.chunk_tokens),
+            tokenizer=tokenizer,
+            overlap=options.overlap,
+        )
+        output.update(chunk_token_limit=options.chunk_tokens, tokenizer=tokenizer.name)
+    else:
+        chunks = chunk_document(
+            units, chunk_char_limit=max(200, options.chunk_chars), overlap=options.overlap
+        )
+        output["chunk_char_limit"] = options.chunk_chars
+    if options.overlap:
+        output["chunk_overlap"] = options.overlap
+    output["chunks"] = chunks
+    return output
+
+
+def output_path(source: Path) -> Path:
+    """``<payload name without extension>.chunks.json`` next to the payload."""
+    name = source.name
+    for extension in sorted(PAYLOAD_EXTENSIONS.values(), key=len, reverse=True):
+        if name.endswith(extension):
+            name = name[: -len(extension)]
+            break
+    return source.with_name(name + CHUNKS_SUFFIX)
+
+
+def collect_payloads(input_dir: Path, pattern: str, force: bool = False) -> tuple[List[Path], int]:
+    """Payloads under ``input_dir`` matching ``pattern`` whose chunks are missing or stale."""
+    payloads: List[Path] = []
+    up_to_date = 0
+    for path in sorted(input_dir.glob(pattern)):
+        name = path.name
+        if not path.is_file() or name.endswith((CHUNKS_SUFFIX, UNITS_TABLE_SUFFIX)):
+            continue
+        if not name.endswith(tuple(PAYLOAD_EXTENSIONS.values())):
+            continue
+        target = output_path(path)
+        if not force and target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+            up_to_date += 1
+            continue
+        payloads.append(path)
+    return payloads, up_to_date
+
+
+@dataclass(frozen=True)
+class ChunkResult:
+    path: Path
+    parser: Optional[str] = None
+    chunk_count: int = 0
+    error: Optional[str] = None
+    skipped: Optional[str] = None
+
+
+def write_output(target: Path, output: dict) -> Path:
+    """Write through a ``.part`` file so an interrupted run never leaves a fresh-looking output."""
+    partial = target.with_name(target.name + ".part")
+    partial.write_text(json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8")
+    partial.replace(target)
+    return target
+
+
+def _chunk_job(job: tuple[Path, Optional[str], ChunkOptions]) -> ChunkResult:
+    path, parser, options = job
+    try:
+        parser = parser or detect_parser(path)
+        if parser is None:
+            return ChunkResult(path, skipped="not a docling, sherpa or gpt5 payload")
+        output = chunk_file(path, parser, options)
+        if not output["chunks"]:
+            return ChunkResult(path, parser, skipped=f"no text units in this {parser} payload")
+        write_output(output_path(path), output)
+    except Exception as exc:  # One unreadable payload must not stop the batch.
+        message = str(exc).strip().splitlines()[0] if str(exc).strip() else ""
+        return ChunkResult(path, parser, error=f"{type(exc).__name__}: {message}")
+    return ChunkResult(path, parser, len(output["chunks"]))
+
+
+def chunk_directory(
+    payloads: Sequence[Path],
+    options: ChunkOptions,
+    workers: int = 1,
+    parser: Optional[str] = None,
+) -> Iterator[ChunkResult]:
+    """
+    Chunk payloads into their ``output_path``, in parallel processes when ``workers`` > 1.
+
+    Yields one ``ChunkResult`` per payload in input order. The parser is detected
+    per file unless given. Files that are not payloads, or that hold no text, carry
+    a ``skipped`` reason and get no output; files that fail carry the ``error``
+    instead of stopping the batch.
+    """
+    jobs = [(path, parser, options) for path in payloads]
+    if workers <= 1 or len(jobs) <= 1:
+        yield from map(_chunk_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        yield from pool.map(_chunk_job, jobs)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Clause-aware chunking for parser payloads.")
-    parser.add_argument("--parser", choices=("docling", "sherpa"), required=True, help="Source parser type.")
-    parser.add_argument("--file", type=Path, required=True, help="Path to the JSON payload to process.")
+    parser.add_argument(
+        "--parser",
+        choices=("docling", "sherpa", "gpt5", "gpt"),
+        help="Source parser type (detected from the payload when omitted; gpt is gpt5).",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", type=Path, help="Path to the JSON payload to process.")
+    source.add_argument(
+        "--input-dir",
+        type=Path,
+        help="Chunk every payload in this directory, writing <payload>.chunks.json next to each.",
+    )
+    parser.add_argument("--glob", default="*", help="Payload pattern within --input-dir (e.g. 'docling_*', '**/*').")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes for --input-dir (default: one per CPU).",
+    )
+    parser.add_argument("--force", action="store_true", help="Rechunk payloads whose output is up to date.")
     parser.add_argument("--chunk-chars", type=int, default=1200, help="Maximum character count per chunk.")
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        help="Maximum token count per chunk; replaces --chunk-chars (e.g. the embedding model limit).",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        default="chars",
+        help="Token counter for --chunk-tokens: chars[:chars_per_token] (default) or tiktoken[:encoding].",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=int,
+        default=0,
+        help="Overlap between the pieces of a unit split for exceeding the limit (chars or tokens).",
+    )
     parser.add_argument("--out", type=Path, help="Optional path to save the chunked JSON.")
     args = parser.parse_args()
+    args.parser = PARSER_ALIASES.get(args.parser, args.parser)
 
-    if args.parser == "docling":
-        units = list(iter_docling_units(args.file))
-    else:
-        units = list(iter_sherpa_units(args.file))
+    options = ChunkOptions(
+        chunk_chars=args.chunk_chars,
+        chunk_tokens=args.chunk_tokens,
+        tokenizer=args.tokenizer,
+        overlap=args.overlap,
+    )
+    if args.chunk_tokens:
+        try:
+            _tokenizer(args.tokenizer)  # Fail on a bad --tokenizer before any work starts.
+        except (RuntimeError, ValueError) as exc:
+            parser.error(str(exc))
+
+    if args.input_dir:
+        if args.out:
+            parser.error("--out only applies to --file; batch outputs go next to each payload")
+        payloads, up_to_date = collect_payloads(args.input_dir, args.glob, force=args.force)
+        written = skipped = failed = 0
+        for result in chunk_directory(payloads, options, args.workers, args.parser):
+            name = result.path.name
+            if result.error is not None:
+                failed += 1
+                print(f"Failed {name}: {result.error}")
+            elif result.skipped is not None:
+                skipped += 1
+                print(f"Skipped {name}: {result.skipped}")
+            else:
+                written += 1
+                target = output_path(result.path).name
+                print(f"{name} ({result.parser}): {result.chunk_count} chunks -> {target}")
+        print(
+            f"Chunked {written} payloads ({up_to_date} already up to date, "
+            f"{skipped} skipped, {failed} failed)"
+        )
+        if failed:
+            raise SystemExit(1)
+        return
 
-    chunks = chunk_document(units, chunk_char_limit=max(200, args.chunk_chars))
-    output = {"source": str(args.file), "parser": args.parser, "chunk_char_limit": args.chunk_chars, "chunks": chunks}
+    source_parser = args.parser or detect_parser(args.file)
+    if source_parser is None:
+        parser.error(f"cannot tell which parser produced {args.file}; pass --parser")
+    output = chunk_file(args.file, source_parser, options)
+    if not output["chunks"]:
+        parser.error(f"no text units in {args.file} as a {source_parser} payload")
 
     if args.out:
-        args.out.write_text(json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8")
-        print(f"Saved {len(chunks)} clause-aware chunks to {args.out}")
+        write_output(args.out, output)
+        print(f"Saved {len(output['chunks'])} clause-aware chunks to {args.out}")
     else:
         print(json.dumps(output, ensure_ascii=False, indent=2))
 
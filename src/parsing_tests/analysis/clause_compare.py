@@ -1,14 +1,15 @@
 from __future__ import annotations
 
 import argparse
-import json
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+from ..utils.payload_store import load_payload
+
 
 def load_chunks(path: Path) -> List[dict]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = load_payload(path)
     return data.get("chunks", [])
 
 
@@ -1,29 +1,29 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Iterable, List, Optional, Sequence
 
-HEADING_REGEX = re.compile(r"^\s*(\d+(?:\.\d+)+)\s+(.*)")
-
+from .payload_reader import (
+    PARSER_ALIASES,
+    SourceUnit,
+    iter_docling_units,
+    iter_gpt_units,
+    iter_sherpa_units,
+)
 
-@dataclass
-class Unit:
-    unit_id: int
-    page: int
-    text: str
+HEADING_REGEX = re.compile(r"^\s*(\d+(?:\.\d+)+)\s+(.*)")
 
 
 @dataclass
 class Clause:
     clause_id: str
     title: str
-    units: List[Unit] = field(default_factory=list)
+    units: List[SourceUnit] = field(default_factory=list)
 
-    def add_unit(self, unit: Unit) -> None:
+    def add_unit(self, unit: SourceUnit) -> None:
         self.units.append(unit)
 
     @property
@@ -35,33 +35,6 @@ class Clause:
         return [unit.unit_id for unit in self.units]
 
 
-def iter_docling_units(path: Path) -> Iterable[Unit]:
-    payload = json.loads(path.read_text(encoding="utf-8"))["result"]["content"]
-    for entry in payload:
-        text = entry.get("chunk_content", "").strip()
-        if not text:
-            continue
-        yield Unit(
-            unit_id=entry.get("chunk_id", -1),
-            page=entry.get("chunk_page", -1),
-            text=text,
-        )
-
-
-def iter_sherpa_units(path: Path) -> Iterable[Unit]:
-    blocks = json.loads(path.read_text(encoding="utf-8"))["return_dict"]["result"]["blocks"]
-    for block in blocks:
-        sentences = block.get("sentences") or []
-        text = " ".join(sentence.strip() for sentence in sentences).strip()
-        if not text:
-            continue
-        yield Unit(
-            unit_id=block.get("block_idx", -1),
-            page=1 + block.get("page_idx", -1),
-            text=text,
-        )
-
-
 def extract_heading(text: str) -> Optional[tuple[str, str]]:
     first_line = text.splitlines()[0].strip()
     match = HEADING_REGEX.match(first_line)
@@ -70,7 +43,7 @@ def extract_heading(text: str) -> Optional[tuple[str, str]]:
     return match.group(1), first_line
 
 
-def build_clauses(units: Iterable[Unit]) -> List[Clause]:
+def build_clauses(units: Iterable[SourceUnit]) -> List[Clause]:
     clauses: List[Clause] = []
     current: Optional[Clause] = None
 
@@ -89,16 +62,19 @@ def build_clauses(units: Iterable[Unit]) -> List[Clause]:
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Preview clause groupings for parser outputs.")
-    parser.add_argument("--parser", choices=("docling", "sherpa"), required=True)
+    parser.add_argument("--parser", choices=("docling", "sherpa", "gpt5", "gpt"), required=True)
     parser.add_argument("--file", type=Path, required=True)
     parser.add_argument("--clause-id", help="Filter down to a specific clause number (e.g., 12.2.2).")
     parser.add_argument("--limit", type=int, default=5, help="Max clauses to display when no filter is provided.")
     args = parser.parse_args()
+    args.parser = PARSER_ALIASES.get(args.parser, args.parser)
 
     if args.parser == "docling":
-        units = list(iter_docling_units(args.file))
+        units = iter_docling_units(args.file)
+    elif args.parser == "gpt5":
+        units = iter_gpt_units(args.file)
     else:
-        units = list(iter_sherpa_units(args.file))
+        units = iter_sherpa_units(args.file)
 
     clauses = build_clauses(units)
     if args.clause_id:
@@ -109,7 +85,7 @@ def main() -> None:
         clauses = clauses[: args.limit]
 
     for clause in clauses:
-        unit_type = "chunk" if args.parser == "docling" else "block"
+        unit_type = {"docling": "chunk", "gpt5": "section"}.get(args.parser, "block")
         print(f"Clause {clause.clause_id}: {clause.title}")
         print(f"  Pages: {clause.pages}")
         print(f"  {unit_type}_ids: {clause.unit_ids}")
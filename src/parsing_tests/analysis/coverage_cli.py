@@ -1,13 +1,16 @@
 """
-Comparison helper for Docling vs LLM Sherpa outputs.
+Comparison helper for Docling, LLM Sherpa and GPT-5 outputs.
 
-Reads a JSON config listing parser runs, loads the saved JSON payloads,
-and computes coverage metrics (pages touched, coverage %, unit counts).
+Reads a JSON config listing parser runs (or queries the results catalog for
+the latest run per PDF), loads the saved JSON payloads, and computes coverage
+metrics (pages touched, coverage %, unit counts).
 
 Usage:
     uv run python -m parsing_tests.analysis.coverage_cli \
         --config data/results/alliade_runs.json \
         --out-csv data/results/alliade_comparison_metrics.csv
+    uv run python -m parsing_tests.analysis.coverage_cli \
+        --latest docling --latest llmsherpa --latest gpt5 --label alliade
 """
 
 from __future__ import annotations
@@ -15,12 +18,17 @@ from __future__ import annotations
 import argparse
 import csv
 import json
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
 from pathlib import Path
 from statistics import mean
 from typing import Iterable, List, Sequence
 
-import pymupdf  # type: ignore
+from ..utils.payload_store import UNITS_TABLE_VERSION, load_payload, units_table_state
+from ..utils.pdf import pdf_page_count
+from ..utils.result_exporter import results_catalog
+from ..utils.results_catalog import file_sha256
+from .payload_reader import iter_gpt_units
 
 
 @dataclass(frozen=True)
@@ -81,8 +89,26 @@ def load_config(path: Path) -> List[RunConfig]:
     return runs
 
 
+def runs_from_catalog(parsers: Sequence[str], label: str | None = None) -> List[RunConfig]:
+    """One run per PDF and parser: the latest catalogued payload (optionally of one label)."""
+    catalog = results_catalog()
+    runs: List[RunConfig] = []
+    for parser in parsers:
+        for entry in catalog.latest_per_pdf(parser, label=label):
+            runs.append(
+                RunConfig(
+                    label=f"{parser}:{Path(entry.pdf_path).stem}",
+                    parser=parser,
+                    pdf_path=Path(entry.pdf_path),
+                    result_path=Path(entry.payload_path),
+                    variant=entry.label or None,
+                )
+            )
+    return runs
+
+
 def analyze_docling(run: RunConfig, pdf_pages: int) -> RunMetrics:
-    payload = json.loads(run.result_path.read_text(encoding="utf-8"))
+    payload = load_payload(run.result_path)
     content = payload["result"]["content"]
     unit_name = "chunks"
     unit_count = len(content)
@@ -107,7 +133,7 @@ def analyze_docling(run: RunConfig, pdf_pages: int) -> RunMetrics:
 
 
 def analyze_llmsherpa(run: RunConfig, pdf_pages: int) -> RunMetrics:
-    payload = json.loads(run.result_path.read_text(encoding="utf-8"))
+    payload = load_payload(run.result_path)
     sherpa_result = payload["return_dict"]["result"]
     blocks = sherpa_result.get("blocks", [])
     unit_name = "blocks"
@@ -134,44 +160,224 @@ def analyze_llmsherpa(run: RunConfig, pdf_pages: int) -> RunMetrics:
     )
 
 
-def analyze_run(run: RunConfig) -> RunMetrics:
-    pdf_pages = len(pymupdf.open(run.pdf_path))
+def analyze_gpt(run: RunConfig, pdf_pages: int) -> RunMetrics:
+    # Streamed as heading-delimited sections, the same units clause_chunker uses;
+    # pages that failed to parse do not count as covered. Only running totals are
+    # kept, so memory stays flat however large the payload. GPT payloads carry no
+    # token counts, so avg_tokens stays empty as for Sherpa.
+    covered: set[int] = set()
+    unit_count = 0
+    for unit in iter_gpt_units(run.result_path):
+        unit_count += 1
+        if isinstance(unit.page, int) and unit.page > 0:
+            covered.add(unit.page)
+    pages = sorted(covered)
+    missing = sorted(set(range(1, pdf_pages + 1)) - set(pages))
+    return RunMetrics(
+        label=run.label,
+        parser=run.parser,
+        variant=run.variant,
+        pdf_path=str(run.pdf_path),
+        pdf_pages=pdf_pages,
+        covered_pages=len(pages),
+        coverage_ratio=len(pages) / pdf_pages if pdf_pages else 0.0,
+        unit_name="sections",
+        unit_count=unit_count,
+        avg_tokens=None,
+        missing_pages=missing,
+        result_path=str(run.result_path),
+    )
+
+
+def analyze_run(run: RunConfig, pdf_pages: int | None = None) -> RunMetrics:
+    if pdf_pages is None:
+        pdf_pages = pdf_page_count(run.pdf_path)
+    if pdf_pages is None:
+        raise FileNotFoundError(f"Cannot open PDF '{run.pdf_path}' for run '{run.label}'")
     if run.parser == "docling":
         return analyze_docling(run, pdf_pages)
     if run.parser in {"llmsherpa", "sherpa"}:
         return analyze_llmsherpa(run, pdf_pages)
+    if run.parser in {"gpt5", "gpt"}:
+        return analyze_gpt(run, pdf_pages)
     raise ValueError(f"Unsupported parser '{run.parser}'")
 
 
-def write_csv(metrics: Iterable[RunMetrics], output_path: Path) -> None:
-    rows = list(metrics)
-    header = [
-        "label",
-        "parser",
-        "variant",
-        "pdf_path",
-        "pdf_pages",
-        "covered_pages",
-        "coverage_ratio",
-        "unit_name",
-        "unit_count",
-        "avg_tokens",
-        "missing_pages",
-        "result_path",
-    ]
+def _analyze_job(job: tuple[RunConfig, int | None]) -> RunMetrics:
+    return analyze_run(*job)
+
+
+def analyze_runs(runs: Sequence[RunConfig], workers: int = 1) -> List[RunMetrics]:
+    """
+    Analyze runs, in parallel processes when ``workers`` > 1.
+
+    Page counts are looked up once per PDF here (memoized on path and mtime) and
+    handed to the workers, so no PDF is opened twice. Results keep the order of
+    ``runs`` whatever the worker count.
+    """
+    page_counts = {str(run.pdf_path): pdf_page_count(run.pdf_path) for run in runs}
+    jobs = [(run, page_counts[str(run.pdf_path)]) for run in runs]
+    if workers <= 1 or len(jobs) <= 1:
+        return [_analyze_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(_analyze_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+CACHE_VERSION = 3
+
+
+class MetricsCache:
+    """
+    RunMetrics persisted per payload, keyed by the payload's and PDF's fingerprints.
+
+    An entry is reused while the payload's path, size, mtime (or, if only the mtime
+    moved, its SHA-256), the parser, the PDF's SHA-256 and the unit version (plus
+    the units table the units were read from, if any) are unchanged. Run labels
+    and variants come from the current config, so renaming a run is free.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("entries", {})
+
+    def _fingerprint(self, run: RunConfig) -> dict:
+        stat = run.result_path.stat()
+        fingerprint = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "parser": run.parser,
+            "pdf_hash": file_sha256(run.pdf_path),
+            "units": f"{UNITS_TABLE_VERSION}/{units_table_state(run.result_path)}",
+        }
+        cached = self.entries.get(str(run.result_path))
+        if cached and all(cached.get(key) == fingerprint[key] for key in ("size", "mtime_ns")):
+            fingerprint["content_hash"] = cached["content_hash"]  # untouched file: skip hashing
+        else:
+            fingerprint["content_hash"] = file_sha256(run.result_path)
+        return fingerprint
+
+    def lookup(self, run: RunConfig) -> RunMetrics | None:
+        cached = self.entries.get(str(run.result_path))
+        if not cached or not run.result_path.exists():
+            return None
+        fingerprint = self._fingerprint(run)
+        if any(cached.get(key) != fingerprint[key] for key in ("content_hash", "parser", "pdf_hash", "units")):
+            return None
+        if cached["mtime_ns"] != fingerprint["mtime_ns"]:
+            cached["mtime_ns"] = fingerprint["mtime_ns"]  # touched but identical
+        metrics = RunMetrics(**cached["metrics"])
+        return replace(
+            metrics, label=run.label, variant=run.variant, pdf_path=str(run.pdf_path)
+        )
+
+    def store(self, run: RunConfig, metrics: RunMetrics) -> None:
+        self.entries[str(run.result_path)] = {
+            **self._fingerprint(run),
+            "metrics": asdict(metrics),
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_name(self.path.name + ".part")
+        partial.write_text(
+            json.dumps({"version": CACHE_VERSION, "entries": self.entries}), encoding="utf-8"
+        )
+        partial.replace(self.path)
+
+
+def analyze_runs_cached(
+    runs: Sequence[RunConfig],
+    cache: MetricsCache,
+    workers: int = 1,
+) -> tuple[List[RunMetrics], int]:
+    """Like ``analyze_runs``, reusing cached metrics; returns them and how many were fresh."""
+    cached = [cache.lookup(run) for run in runs]
+    stale = [run for run, metrics in zip(runs, cached) if metrics is None]
+    fresh = iter(analyze_runs(stale, workers=workers))
+    results: List[RunMetrics] = []
+    for run, metrics in zip(runs, cached):
+        if metrics is None:
+            metrics = next(fresh)
+            cache.store(run, metrics)
+        results.append(metrics)
+    cache.save()
+    return results, len(stale)
+
+
+CSV_HEADER = [
+    "label",
+    "parser",
+    "variant",
+    "pdf_path",
+    "pdf_pages",
+    "covered_pages",
+    "coverage_ratio",
+    "unit_name",
+    "unit_count",
+    "avg_tokens",
+    "missing_pages",
+    "result_path",
+]
+
+
+def write_csv(metrics: Iterable[RunMetrics], output_path: Path, merge: bool = False) -> None:
+    """
+    Write the metrics CSV. With ``merge``, rows already in the file are kept and a
+    row with the same label and result path is replaced in place; new rows follow.
+    """
+    rows = [metric.to_row() for metric in metrics]
+    if merge and output_path.exists():
+        label_index, path_index = CSV_HEADER.index("label"), CSV_HEADER.index("result_path")
+        new_rows = {(row[label_index], row[path_index]): row for row in rows}
+        with output_path.open(newline="", encoding="utf-8") as csvfile:
+            existing = list(csv.reader(csvfile))[1:]
+        merged = [
+            new_rows.pop((row[label_index], row[path_index]), row)
+            for row in existing
+            if len(row) == len(CSV_HEADER)
+        ]
+        rows = merged + list(new_rows.values())
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with output_path.open("w", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerow(header)
-        for metric in rows:
-            writer.writerow(metric.to_row())
+        writer.writerow(CSV_HEADER)
+        writer.writerows(rows)
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Compute coverage metrics for Docling and LLM Sherpa runs."
+        description="Compute coverage metrics for Docling, LLM Sherpa and GPT-5 runs."
+    )
+    parser.add_argument("--config", type=Path, help="JSON file listing runs.")
+    parser.add_argument(
+        "--latest",
+        action="append",
+        choices=("docling", "llmsherpa", "gpt5"),
+        help="Add the latest catalogued run of this parser for every PDF; repeatable.",
+    )
+    parser.add_argument("--label", help="With --latest, only consider runs with this RUN_LABEL.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Analyze runs in this many processes (default 1: serial).",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=Path("data/results/coverage_cache.json"),
+        help="Per-payload metrics cache; only new or changed payloads are re-analyzed.",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every run.")
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Update matching rows of an existing --out-csv instead of overwriting it.",
     )
-    parser.add_argument("--config", required=True, type=Path, help="JSON file listing runs.")
     parser.add_argument(
         "--out-csv",
         type=Path,
@@ -179,12 +385,22 @@ def main() -> None:
         help="Where to store the aggregated metrics CSV.",
     )
     args = parser.parse_args()
+    if not args.config and not args.latest:
+        parser.error("pass --config and/or --latest")
 
-    runs = load_config(args.config)
-    metrics = [analyze_run(run) for run in runs]
-    write_csv(metrics, args.out_csv)
+    runs = load_config(args.config) if args.config else []
+    runs += runs_from_catalog(args.latest or [], label=args.label)
+    if args.no_cache:
+        metrics = analyze_runs(runs, workers=args.workers)
+        analyzed = len(metrics)
+    else:
+        metrics, analyzed = analyze_runs_cached(runs, MetricsCache(args.cache), args.workers)
+    write_csv(metrics, args.out_csv, merge=args.merge)
 
-    print(f"Wrote {len(metrics)} rows to {args.out_csv}")
+    print(
+        f"Wrote {len(metrics)} rows to {args.out_csv} "
+        f"({analyzed} analyzed, {len(metrics) - analyzed} from cache)"
+    )
     for metric in metrics:
         missing_desc = "none" if not metric.missing_pages else ", ".join(
             f"p{page}" for page in metric.missing_pages
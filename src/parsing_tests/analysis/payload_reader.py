@@ -0,0 +1,234 @@
+"""
+Lazy unit readers shared by the clause tools.
+
+Units are streamed out of saved payloads one at a time: plain JSON files are
+memory-mapped and fed to ``ijson``, compressed ones are decompressed as a
+stream, so memory stays flat and the first unit arrives before the rest of the
+file is parsed. Without ``ijson`` (or for msgpack payloads) the payload is
+loaded once and walked instead.
+"""
+
+from __future__ import annotations
+
+import mmap
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional
+
+from ..gpt.page_journal import is_error_content
+from ..utils.payload_store import detect_format, load_payload, open_json_payload, read_units_table
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+@dataclass(slots=True)
+class SourceUnit:
+    unit_id: int
+    page: int
+    text: str
+
+
+# Where each parser keeps its units inside the payload.
+UNIT_ARRAYS: Dict[str, tuple[str, ...]] = {
+    "docling": ("result", "content"),
+    "sherpa": ("return_dict", "result", "blocks"),
+    "gpt5": ("chunks",),
+}
+# Other names the CLIs accept for a parser (coverage_cli run configs say "gpt").
+PARSER_ALIASES: Dict[str, str] = {"gpt": "gpt5"}
+
+
+def docling_unit(chunk: dict) -> Optional[SourceUnit]:
+    text = chunk.get("chunk_content", "").strip()
+    if not text:
+        return None
+    return SourceUnit(
+        unit_id=chunk.get("chunk_id", -1),
+        page=chunk.get("chunk_page", -1),
+        text=text,
+    )
+
+
+def sherpa_unit(block: dict) -> Optional[SourceUnit]:
+    sentences = block.get("sentences") or []
+    text = " ".join(sentence.strip() for sentence in sentences).strip()
+    if not text:
+        return None
+    return SourceUnit(
+        unit_id=block.get("block_idx", -1),
+        page=1 + block.get("page_idx", -1),
+        text=text,
+    )
+
+
+# A GPT section starts at a markdown heading or at a numbered / ARTICLE clause
+# line (optionally in bold).
+GPT_SECTION_START = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]|(?:\*\*)?(?:\d+(?:\.\d+)+[ \t]|ARTICLE[ \t]+\d))",
+    re.MULTILINE | re.IGNORECASE,
+)
+HEADING_MARKUP = re.compile(r"^#{1,6}[ \t]+|\*\*")
+
+
+def gpt_sections(content: str) -> Iterator[str]:
+    """
+    Heading-delimited sections of one page of GPT markdown, in order.
+
+    Text before the first heading continues the previous page's section and is
+    yielded on its own; heading lines lose their ``#``/``**`` markup so the
+    clause tools see plain ``12.2 Title`` lines.
+    """
+    start, is_heading = 0, False
+    for match in GPT_SECTION_START.finditer(content):
+        yield from _gpt_section(content[start : match.start()], is_heading)
+        start, is_heading = match.start(), True
+    yield from _gpt_section(content[start:], is_heading)
+
+
+def _gpt_section(section: str, is_heading: bool) -> Iterator[str]:
+    section = section.strip()
+    if not section:
+        return
+    if is_heading:
+        heading, newline, body = section.partition("\n")
+        section = HEADING_MARKUP.sub("", heading).strip() + newline + body
+    yield section
+
+
+def gpt_units(pages: Iterable[Any]) -> Iterator[SourceUnit]:
+    """One unit per section of each parsed page; pages that failed to parse are skipped."""
+    unit_id = 0
+    for chunk in pages:
+        if not isinstance(chunk, dict):
+            continue
+        content = chunk.get("content") or ""
+        if is_error_content(content):
+            continue
+        page = chunk.get("page", -1)
+        for section in gpt_sections(content):
+            yield SourceUnit(unit_id=unit_id, page=page, text=section)
+            unit_id += 1
+
+
+UNIT_BUILDERS: Dict[str, Callable[[dict], Optional[SourceUnit]]] = {
+    "docling": docling_unit,
+    "sherpa": sherpa_unit,
+}
+
+
+@contextmanager
+def _open_lazy(path: Path) -> Iterator[BinaryIO]:
+    if detect_format(path) != "json":
+        with open_json_payload(path) as handle:
+            yield handle
+        return
+    with path.open("rb") as raw:
+        if path.stat().st_size == 0:
+            yield raw
+            return
+        with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped  # type: ignore[misc]
+
+
+def iter_items(path: Path, keys: tuple[str, ...]) -> Iterator[Any]:
+    """Items of the array at ``keys`` in the payload, parsed one at a time."""
+    path = Path(path)
+    if ijson is not None and detect_format(path) != "msgpack":
+        with _open_lazy(path) as handle:
+            yield from ijson.items(handle, ".".join(keys) + ".item", use_float=True)
+        return
+    node = load_payload(path)
+    for key in keys:
+        node = node[key]
+    yield from node
+
+
+def iter_units(path: Path, parser: str) -> Iterator[SourceUnit]:
+    """Units of a ``docling``, ``sherpa`` or ``gpt5`` payload, from its units table if fresh."""
+    table = read_units_table(Path(path))
+    if table is not None:
+        yield from (SourceUnit(**row) for row in table)
+        return
+    if parser == "gpt5":
+        # GPT pages hold several sections each, so they are split rather than mapped.
+        yield from gpt_units(iter_items(path, UNIT_ARRAYS[parser]))
+        return
+    build = UNIT_BUILDERS[parser]
+    for item in iter_items(path, UNIT_ARRAYS[parser]):
+        unit = build(item) if isinstance(item, dict) else None
+        if unit is not None:
+            yield unit
+
+
+def _gpt_shape(parser_name: Any, first_chunk_keys: Optional[set]) -> Optional[str]:
+    """``gpt5`` for a GPT payload's ``chunks``; None for lookalikes such as clause_chunker output."""
+    if isinstance(parser_name, str) and parser_name.lower().startswith("gpt"):
+        return "gpt5"
+    if first_chunk_keys and {"page", "content"} <= first_chunk_keys and "clause_id" not in first_chunk_keys:
+        return "gpt5"
+    return None
+
+
+def detect_parser(path: Path) -> Optional[str]:
+    """
+    Parser that produced a payload, from its shape: ``result.content`` (docling),
+    ``return_dict`` (sherpa) or ``chunks`` of ``{"page", "content"}`` items /
+    ``"parser": "gpt-5"`` (gpt5); None for anything else, including clause_chunker
+    outputs (top-level ``source``, chunks with ``clause_id``).
+    """
+    path = Path(path)
+    if ijson is not None and detect_format(path) != "msgpack":
+        # Stops as soon as the shape is known instead of parsing the whole payload.
+        parser_name: Any = None
+        has_chunks = False
+        chunk_keys: Optional[set] = None
+        with _open_lazy(path) as handle:
+            for prefix, event, value in ijson.parse(handle):
+                if prefix == "parser" and event == "string":
+                    parser_name = value
+                    if _gpt_shape(parser_name, None):
+                        return "gpt5"
+                elif event == "map_key" and prefix == "":
+                    if value == "return_dict":
+                        return "sherpa"
+                    if value == "source":
+                        return None  # clause_chunker output
+                    has_chunks = has_chunks or value == "chunks"
+                elif event == "map_key" and prefix == "result" and value == "content":
+                    return "docling"
+                elif prefix == "chunks.item" and event == "start_map" and chunk_keys is None:
+                    chunk_keys = set()
+                elif event == "map_key" and prefix == "chunks.item" and chunk_keys is not None:
+                    chunk_keys.add(value)
+                elif prefix == "chunks.item" and event == "end_map":
+                    return _gpt_shape(parser_name, chunk_keys)
+        return _gpt_shape(parser_name, chunk_keys) if has_chunks else None
+    payload = load_payload(path)
+    if not isinstance(payload, dict) or "source" in payload:
+        return None
+    if "return_dict" in payload:
+        return "sherpa"
+    if isinstance(payload.get("result"), dict) and "content" in payload["result"]:
+        return "docling"
+    chunks = payload.get("chunks")
+    if isinstance(chunks, list):
+        first = chunks[0] if chunks and isinstance(chunks[0], dict) else None
+        return _gpt_shape(payload.get("parser"), set(first) if first is not None else None)
+    return None
+
+
+def iter_docling_units(path: Path) -> Iterator[SourceUnit]:
+    return iter_units(path, "docling")
+
+
+def iter_sherpa_units(path: Path) -> Iterator[SourceUnit]:
+    return iter_units(path, "sherpa")
+
+
+def iter_gpt_units(path: Path) -> Iterator[SourceUnit]:
+    return iter_units(path, "gpt5")
@@ -0,0 +1,86 @@
+"""
+Token counters for token-budgeted chunking.
+
+Backends are picked by a ``name[:option]`` spec: ``chars[:chars_per_token]``
+estimates tokens from the text length and needs nothing extra;
+``tiktoken[:encoding]`` counts real BPE tokens when ``tiktoken`` is installed.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Callable, Dict, Iterable, List, Protocol, Sequence
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_CHARS_PER_TOKEN = 4.0
+DEFAULT_ENCODING = "cl100k_base"
+
+
+class Tokenizer(Protocol):
+    name: str
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        """Token count of each text."""
+        ...
+
+
+class CharRatioTokenizer:
+    """Estimates ``ceil(len(text) / chars_per_token)``; ~4 chars/token suits English and French prose."""
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        if chars_per_token <= 0:
+            raise ValueError("chars_per_token must be positive")
+        self.chars_per_token = chars_per_token
+        self.name = f"chars:{chars_per_token:g}"
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        return [math.ceil(len(text) / self.chars_per_token) for text in texts]
+
+
+class TiktokenTokenizer:
+    def __init__(self, encoding: str = DEFAULT_ENCODING):
+        if tiktoken is None:
+            raise RuntimeError(
+                "The tiktoken tokenizer requires the 'tiktoken' package (uv sync --extra tiktoken)"
+            )
+        self.encoding = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken:{encoding}"
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        # Special-token text in a contract is plain text; encode_ordinary never raises on it.
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(list(texts))]
+
+
+TOKENIZERS: Dict[str, Callable[..., Tokenizer]] = {
+    "chars": lambda option=None: CharRatioTokenizer(
+        float(option) if option else DEFAULT_CHARS_PER_TOKEN
+    ),
+    "tiktoken": lambda option=None: TiktokenTokenizer(option or DEFAULT_ENCODING),
+}
+
+
+def get_tokenizer(spec: str) -> Tokenizer:
+    """Tokenizer for a spec such as ``chars``, ``chars:3.5`` or ``tiktoken:o200k_base``."""
+    name, _, option = spec.strip().partition(":")
+    factory = TOKENIZERS.get(name.lower())
+    if factory is None:
+        raise ValueError(f"Unknown tokenizer '{name}'; expected one of {', '.join(TOKENIZERS)}")
+    try:
+        return factory(option or None)
+    except OSError as exc:  # includes requests' ConnectionError
+        # tiktoken downloads its BPE file on first use and caches it afterwards.
+        raise RuntimeError(
+            f"Could not load the '{spec}' tokenizer ({type(exc).__name__}); tiktoken needs network "
+            "access once to fetch its encoding, or a pre-filled TIKTOKEN_CACHE_DIR. "
+            "Use --tokenizer chars offline."
+        ) from exc
+
+
+def count_tokens(tokenizer: Tokenizer, texts: Iterable[str]) -> Dict[str, int]:
+    """Token count per distinct text, tokenized in one batch."""
+    distinct = list(dict.fromkeys(texts))
+    return dict(zip(distinct, tokenizer.count_batch(distinct)))
@@ -0,0 +1,112 @@
+"""
+Convert saved parser payloads to a compact format and build their units tables.
+
+Example:
+    uv run python -m parsing_tests.cli.compact_results --format zst --units
+    uv run python -m parsing_tests.cli.compact_results data/results/docling_*.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+from typing import Iterable, List
+
+from ..analysis.clause_chunker import CHUNKS_SUFFIX
+from ..analysis.payload_reader import iter_docling_units, iter_gpt_units, iter_sherpa_units
+from ..utils.payload_store import (
+    PAYLOAD_EXTENSIONS,
+    UNITS_TABLE_SUFFIX,
+    convert_payload,
+    format_for_path,
+    units_table_path,
+    write_units_table,
+)
+from ..utils.result_exporter import RESULTS_DIR, results_catalog
+
+UNIT_READERS = {
+    "docling": iter_docling_units,
+    "llmsherpa": iter_sherpa_units,
+    "gpt5": iter_gpt_units,
+}
+# Payloads are named <parser>_<pdf>_<timestamp>...; anything else (run configs,
+# clause chunk outputs) is left alone.
+PAYLOAD_PARSERS = ("docling", "llmsherpa", "gpt5")
+
+
+def _is_payload(path: Path) -> bool:
+    name = path.name
+    if name.endswith((UNITS_TABLE_SUFFIX, CHUNKS_SUFFIX)) or name.split("_", 1)[0].lower() not in PAYLOAD_PARSERS:
+        return False
+    return any(name.endswith(extension) for extension in PAYLOAD_EXTENSIONS.values())
+
+
+def _collect_payloads(paths: Iterable[Path]) -> List[Path]:
+    payloads: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            payloads.extend(sorted(item for item in path.iterdir() if _is_payload(item)))
+        elif _is_payload(path):
+            payloads.append(path)
+    return payloads
+
+
+def _parser_for(path: Path) -> str | None:
+    prefix = path.name.split("_", 1)[0].lower()
+    return prefix if prefix in UNIT_READERS else None
+
+
+def compact(path: Path, fmt: str, units: bool) -> tuple[Path, int, int]:
+    """Convert one payload (and optionally tabulate its units); returns sizes before/after."""
+    before = path.stat().st_size
+    target = path
+    if format_for_path(path) != fmt:
+        target = convert_payload(path, fmt)
+        results_catalog().move(path, target)
+    parser = _parser_for(target)
+    if units and parser is not None:
+        rows = (
+            {"unit_id": unit.unit_id, "page": unit.page, "text": unit.text}
+            for unit in UNIT_READERS[parser](target)
+        )
+        write_units_table(units_table_path(target), rows)
+    return target, before, target.stat().st_size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact saved parser payloads.")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        type=Path,
+        help="Payload files or directories (defaults to data/results).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=tuple(PAYLOAD_EXTENSIONS),
+        default=os.getenv("RESULTS_FORMAT") or "zst",
+        help="Target payload format (defaults to RESULTS_FORMAT, else zst).",
+    )
+    parser.add_argument(
+        "--units",
+        action="store_true",
+        help="Also write a Parquet units table next to each payload.",
+    )
+    args = parser.parse_args()
+
+    payloads = _collect_payloads(args.paths or [RESULTS_DIR])
+    total_before = total_after = 0
+    for path in payloads:
+        target, before, after = compact(path, args.format, args.units)
+        total_before += before
+        total_after += after
+        print(f"{target.name}: {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB")
+    if payloads:
+        print(
+            f"{len(payloads)} payloads: {total_before / 1e6:.1f} MB -> {total_after / 1e6:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,29 @@
+import argparse
 import json
 import logging
 import os
 import time
-from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Dict, List
 
 import requests
 
 from ..utils.env import get_env_value, load_env
-from ..utils.result_exporter import append_metrics, save_json_payload
+from ..utils.http import get_session, http_timeout
+from ..utils.multipart import UploadStats, post_multipart
+from ..utils.polling import PollSchedule, estimate_duration
+from ..utils.result_exporter import (
+    STREAM_CHUNK_BYTES,
+    append_metrics,
+    payload_path,
+    read_metrics,
+    record_result,
+    save_stream_payload,
+    summarize_payload,
+)
 
 '''
 Docling Parsing CLI
@@ -76,10 +89,15 @@ class DoclingClient:
     def __init__(self, base_url: str, api_key: str):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
-        self._session = requests.Session()
+        self._session = get_session()
 
-    def start_parsing(self, pdf_path: str | Path, pdf_settings: PdfSettings) -> dict[str, Any]:
-        """Send the PDF to the Docling REST API."""
+    def start_parsing(
+        self,
+        pdf_path: str | Path,
+        pdf_settings: PdfSettings,
+        upload: UploadStats | None = None,
+    ) -> dict[str, Any]:
+        """Stream the PDF to the Docling REST API, recording transfer stats in ``upload``."""
         pdf_path = Path(pdf_path)
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
@@ -88,28 +106,41 @@ class DoclingClient:
         params = {"API_KEY": self.api_key}
         payload = pdf_settings.to_payload()
         with pdf_path.open("rb") as pdf_file:
-            files = {"file": (pdf_path.name, pdf_file, "application/pdf")}
-            response = self._session.post(
+            response = post_multipart(
+                self._session,
                 url,
+                fields={"settings": json.dumps(payload)},
+                filename=pdf_path.name,
+                fileobj=pdf_file,
+                stats=upload,
                 params=params,
                 headers={"Accept": "application/json"},
-                data={"settings": json.dumps(payload)},
-                files=files,
-                timeout=120,
+                timeout=http_timeout(120),
             )
         return self._handle_response(response, "Docling start failed")
 
-    def get_result(self, task_id: str) -> dict[str, Any]:
-        """Retrieve the parsing result for the given task."""
+    def get_result(self, task_id: str, sink: Path | None = None) -> dict[str, Any]:
+        """
+        Retrieve the parsing result for the given task.
+
+        With ``sink`` the body is streamed into that file rather than parsed in
+        memory, and only its summary (see ``summarize_payload``) is returned.
+        """
         url = f"{self.base_url}/result-parsing/{task_id}"
         params = {"API_KEY": self.api_key}
         response = self._session.get(
             url,
             params=params,
             headers={"Accept": "application/json"},
-            timeout=60,
+            timeout=http_timeout(60),
+            stream=sink is not None,
         )
-        return self._handle_response(response, "Docling result failed")
+        if sink is None:
+            return self._handle_response(response, "Docling result failed")
+        with response:
+            self._check_response(response, "Docling result failed")
+            save_stream_payload(sink, response.iter_content(STREAM_CHUNK_BYTES))
+        return summarize_payload(sink)
 
     def wait_for_completion(
         self,
@@ -117,10 +148,21 @@ class DoclingClient:
         pdf_settings: PdfSettings,
         poll_interval: float,
         max_attempts: int,
+        schedule: PollSchedule | None = None,
+        upload: UploadStats | None = None,
+        sink: Path | None = None,
     ) -> dict[str, Any]:
-        """Start a parsing job and wait for the final result."""
-        start_response = self.start_parsing(pdf_path, pdf_settings)
-        logging.info("Docling start response: %s", json.dumps(start_response, indent=2))
+        """
+        Start a parsing job and wait for the final result.
+
+        With ``sink`` the result is written to that file and its summary returned.
+        """
+        start_response = self.start_parsing(pdf_path, pdf_settings, upload)
+        logging.info(
+            "Docling start response: task_id=%s status=%s",
+            start_response.get("task_id"),
+            start_response.get("status") or "<unknown>",
+        )
 
         task_id = start_response.get("task_id")
         if not task_id:
@@ -128,17 +170,24 @@ class DoclingClient:
 
         if start_response.get("result"):
             logging.info("Docling completed synchronously for %s", task_id)
-            return start_response
+            return _keep_result(start_response, sink)
 
         return poll_for_result(
             self,
             task_id,
             poll_interval=poll_interval,
             max_attempts=max_attempts,
+            schedule=schedule,
+            sink=sink,
         )
 
+    @classmethod
+    def _handle_response(cls, response: requests.Response, context: str) -> dict[str, Any]:
+        cls._check_response(response, context)
+        return response.json()
+
     @staticmethod
-    def _handle_response(response: requests.Response, context: str) -> dict[str, Any]:
+    def _check_response(response: requests.Response, context: str) -> None:
         try:
             response.raise_for_status()
         except requests.HTTPError as exc:
@@ -146,7 +195,6 @@ class DoclingClient:
             status = exc.response.status_code if exc.response else "unknown"
             logging.error("%s (%s): %s", context, status, body)
             raise
-        return response.json()
 
 
 def poll_for_result(
@@ -154,23 +202,213 @@ def poll_for_result(
     task_id: str,
     poll_interval: float = 5.0,
     max_attempts: int = 20,
+    schedule: PollSchedule | None = None,
+    sink: Path | None = None,
 ) -> dict[str, Any]:
-    """Poll the result endpoint until it leaves Pending or attempts exhausted."""
-    for attempt in range(1, max_attempts + 1):
-        result = client.get_result(task_id)
-        status = (result.get("status") or "").lower()
-        has_payload = result.get("result") not in (None, "")
+    """
+    Poll the result endpoint until it leaves Pending or the schedule times out.
+
+    Without a ``schedule``, polls back off from 1s up to ``poll_interval`` within the
+    same overall budget as ``max_attempts`` fixed-interval polls. With ``sink`` each
+    poll streams into that file (removed again while the task is pending) and the
+    summary of the final one is returned.
+    """
+    schedule = schedule or PollSchedule(
+        max_interval=poll_interval, timeout=poll_interval * max_attempts
+    )
+    while True:
+        result = client.get_result(task_id, sink)
+        finished = _is_finished(result)
+        schedule.record_poll(finished)
         logging.info(
-            "Result poll %s/%s: status=%s payload=%s",
-            attempt,
-            max_attempts,
-            status or "<unknown>",
-            "yes" if has_payload else "no",
+            "Result poll %s (%.0fs elapsed): status=%s payload=%s",
+            schedule.attempts,
+            schedule.elapsed,
+            (result.get("status") or "").lower() or "<unknown>",
+            "yes" if _has_payload(result) else "no",
         )
-        if has_payload or (status and status not in {"pending", "processing"}):
+        if finished:
             return result
-        time.sleep(poll_interval)
-    raise TimeoutError(f"Docling task {task_id} did not finish after {max_attempts} attempts")
+        if sink is not None:
+            sink.unlink(missing_ok=True)
+        if schedule.expired():
+            raise TimeoutError(
+                f"Docling task {task_id} did not finish after {schedule.attempts} polls "
+                f"({schedule.elapsed:.0f}s)"
+            )
+        time.sleep(schedule.next_delay())
+
+
+def _has_payload(result: dict[str, Any]) -> bool:
+    # Streamed polls only return a summary, which says whether the file had a result.
+    return bool(result.get("has_result")) or result.get("result") not in (None, "")
+
+
+def _is_finished(result: dict[str, Any]) -> bool:
+    status = (result.get("status") or "").lower()
+    return _has_payload(result) or bool(status and status not in {"pending", "processing"})
+
+
+def _keep_result(result: dict[str, Any], sink: Path | None) -> dict[str, Any]:
+    """Write an already-parsed result to ``sink`` and summarize it; no-op without one."""
+    if sink is None:
+        return result
+    save_stream_payload(sink, [json.dumps(result).encode("utf-8")])
+    return summarize_payload(result)
+
+
+def build_poll_schedule(
+    pdf_path: str | Path,
+    poll_interval: float,
+    max_attempts: int,
+    history: List[dict[str, Any]],
+) -> PollSchedule:
+    """Schedule centred on the duration predicted from page count and past runs."""
+    expected = estimate_duration(pdf_path, history)
+    if expected is not None:
+        logging.info("Predicted Docling duration for %s: %.0fs", pdf_path, expected)
+    return PollSchedule(
+        expected,
+        max_interval=poll_interval,
+        timeout=max(poll_interval * max_attempts, 2 * (expected or 0.0)),
+    )
+
+
+@dataclass
+class DoclingJob:
+    pdf_path: str
+    task_id: str | None = None
+    submitted_at: float = 0.0
+    finished_at: float = 0.0
+    schedule: PollSchedule | None = None
+    upload: UploadStats = field(default_factory=UploadStats)
+    result_path: Path | None = None
+    next_poll_at: float = 0.0
+    result: dict[str, Any] | None = None
+    error: Exception | None = None
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.submitted_at
+
+
+def run_batch(
+    client: DoclingClient,
+    pdf_paths: List[str],
+    pdf_settings: PdfSettings,
+    *,
+    concurrency: int = 4,
+    poll_interval: float = 5.0,
+    max_attempts: int = 20,
+    on_complete: Callable[[DoclingJob], None] | None = None,
+    result_path: Callable[[str], Path] | None = None,
+) -> List[DoclingJob]:
+    """
+    Parse many PDFs with at most ``concurrency`` Docling jobs in flight.
+
+    Uploads run on a small thread pool; a single scheduler loop polls each
+    outstanding task_id when it is due and hands finished jobs to ``on_complete``
+    immediately, so total wall time tracks the slowest document. Each job polls on
+    its own adaptive schedule predicted from its page count and past runs.
+
+    With ``result_path``, each job's result is streamed to ``result_path(pdf_path)``
+    and ``job.result`` only holds its summary.
+    """
+    jobs = [
+        DoclingJob(pdf_path=pdf_path, result_path=result_path(pdf_path) if result_path else None)
+        for pdf_path in pdf_paths
+    ]
+    history = read_metrics("docling")
+    queued = list(reversed(jobs))
+    uploads: Dict[Future, DoclingJob] = {}
+    active: List[DoclingJob] = []
+    concurrency = max(1, concurrency)
+
+    def finish(job: DoclingJob, result: dict[str, Any] | None, error: Exception | None) -> None:
+        job.finished_at = time.perf_counter()
+        job.result, job.error = result, error
+        if error is not None:
+            logging.error("Docling job for %s failed: %s", job.pdf_path, error)
+        else:
+            logging.info("Docling job for %s finished in %.1fs", job.pdf_path, job.duration)
+        if on_complete is not None:
+            on_complete(job)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="docling-upload") as pool:
+        while queued or uploads or active:
+            while queued and len(uploads) + len(active) < concurrency:
+                job = queued.pop()
+                job.submitted_at = time.perf_counter()
+                job.schedule = build_poll_schedule(
+                    job.pdf_path, poll_interval, max_attempts, history
+                )
+                uploads[
+                    pool.submit(client.start_parsing, job.pdf_path, pdf_settings, job.upload)
+                ] = job
+
+            # Sleep until the next job is due for a poll, waking early when an upload lands.
+            timeout = None
+            if active:
+                timeout = max(0.0, min(job.next_poll_at for job in active) - time.perf_counter())
+            if uploads:
+                done, _ = wait(list(uploads), timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(timeout or 0.0)
+                done = set()
+            for future in done:
+                job = uploads.pop(future)
+                try:
+                    start_response = future.result()
+                except Exception as exc:
+                    finish(job, None, exc)
+                    continue
+                job.task_id = start_response.get("task_id")
+                if start_response.get("result"):
+                    finish(job, _keep_result(start_response, job.result_path), None)
+                elif not job.task_id:
+                    finish(job, None, RuntimeError("Docling did not return a task_id"))
+                else:
+                    logging.info("Docling task %s started for %s", job.task_id, job.pdf_path)
+                    job.next_poll_at = time.perf_counter() + job.schedule.next_delay()
+                    active.append(job)
+
+            still_running: List[DoclingJob] = []
+            for job in active:
+                if job.next_poll_at > time.perf_counter():
+                    still_running.append(job)
+                    continue
+                try:
+                    result = client.get_result(job.task_id, job.result_path)
+                except Exception as exc:
+                    finish(job, None, exc)
+                    continue
+                finished = _is_finished(result)
+                job.schedule.record_poll(finished)
+                logging.info(
+                    "Result poll %s for %s (%.0fs elapsed): status=%s",
+                    job.schedule.attempts,
+                    job.task_id,
+                    job.schedule.elapsed,
+                    (result.get("status") or "").lower() or "<unknown>",
+                )
+                if not finished and job.result_path is not None:
+                    job.result_path.unlink(missing_ok=True)
+                if finished:
+                    finish(job, result, None)
+                elif job.schedule.expired():
+                    finish(
+                        job,
+                        None,
+                        TimeoutError(
+                            f"Docling task {job.task_id} did not finish after "
+                            f"{job.schedule.attempts} polls ({job.schedule.elapsed:.0f}s)"
+                        ),
+                    )
+                else:
+                    job.next_poll_at = time.perf_counter() + job.schedule.next_delay()
+                    still_running.append(job)
+            active = still_running
+    return jobs
 
 
 def _choice_from_env(env_key: str, enum_cls: type[Enum], default: Enum) -> Enum:
@@ -229,11 +467,86 @@ def resolve_docling_credentials() -> tuple[str, str, str]:
     return base_url.rstrip("/"), api_key, env_name
 
 
+def _save_result(
+    pdf_path: str,
+    result_path: Path,
+    summary: dict[str, Any],
+    duration: float,
+    env_name: str,
+    experiment_label: str | None,
+    run_notes: str,
+    schedule: PollSchedule | None = None,
+    upload: UploadStats | None = None,
+) -> None:
+    extra: dict[str, Any] = {
+        "notes": run_notes or env_name,
+        "chunk_count": summary["chunk_count"],
+        "execution_time": summary["execution_time"],
+    }
+    if upload is not None:
+        extra.update(upload.to_metrics(duration))
+    if schedule is not None:
+        extra["poll_attempts"] = schedule.attempts
+        if schedule.poll_latency is not None:
+            extra["poll_latency_seconds"] = f"{schedule.poll_latency:.2f}"
+    record_result("docling", pdf_path, result_path, experiment_label, summary["chunk_count"])
+    metrics_path = append_metrics(
+        "docling",
+        pdf_path,
+        summary,
+        duration,
+        parser_env=env_name,
+        experiment=experiment_label,
+        extra=extra,
+    )
+    logging.info("Saved Docling payload to %s", result_path)
+    logging.info("Appended Docling metrics to %s", metrics_path)
+
+
+def _log_summary(summary: dict[str, Any]) -> None:
+    logging.info(
+        "Docling final result: status=%s chunks=%s execution_time=%s",
+        summary["status"] or "<unknown>",
+        summary["chunk_count"],
+        summary["execution_time"] or "<n/a>",
+    )
+
+
+def _collect_pdf_paths(args: argparse.Namespace) -> List[str]:
+    pdf_paths = [str(path).strip() for path in args.pdf or []]
+    for pdf_dir in args.pdf_dir or []:
+        pdf_paths.extend(str(path) for path in sorted(pdf_dir.glob("*.pdf")))
+    if pdf_paths:
+        return pdf_paths
+    raw_pdf_path = get_env_value("DOCLING_PDF_PATH")
+    return [(raw_pdf_path if raw_pdf_path is not None else r"data\reseau ASF.pdf").strip()]
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Parse PDFs with the Docling start/poll API.")
+    parser.add_argument(
+        "--pdf",
+        action="append",
+        type=Path,
+        help="PDF to parse; repeat for a batch (defaults to DOCLING_PDF_PATH).",
+    )
+    parser.add_argument(
+        "--pdf-dir",
+        action="append",
+        type=Path,
+        help="Directory whose *.pdf files are added to the batch.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=_optional_int(os.getenv("DOCLING_CONCURRENCY"), default=4),
+        help="Maximum Docling jobs in flight when parsing several PDFs.",
+    )
+    args = parser.parse_args()
+
     docling_url, docling_api_key, env_name = resolve_docling_credentials()
 
-    raw_pdf_path = get_env_value("DOCLING_PDF_PATH")
-    pdf_path = (raw_pdf_path if raw_pdf_path is not None else r"data\reseau ASF.pdf").strip()
+    pdf_paths = _collect_pdf_paths(args)
     poll_interval = float(os.getenv("DOCLING_POLL_INTERVAL", "5"))
     max_attempts = int(os.getenv("DOCLING_POLL_ATTEMPTS", "40"))
     experiment_label = os.getenv("RUN_LABEL")
@@ -245,33 +558,78 @@ def main() -> None:
         "Docling ENV=%s | URL=%s | PDF=%s | Settings=%s | Run=%s",
         env_name,
         docling_url,
-        pdf_path,
+        pdf_paths[0] if len(pdf_paths) == 1 else f"{len(pdf_paths)} files",
         pdf_settings,
         experiment_label or "<none>",
     )
 
+    if len(pdf_paths) == 1:
+        pdf_path = pdf_paths[0]
+        schedule = build_poll_schedule(
+            pdf_path, poll_interval, max_attempts, read_metrics("docling")
+        )
+        upload = UploadStats()
+        result_path = payload_path("docling", pdf_path, experiment_label)
+        start = time.perf_counter()
+        summary = client.wait_for_completion(
+            pdf_path,
+            pdf_settings,
+            poll_interval=poll_interval,
+            max_attempts=max_attempts,
+            schedule=schedule,
+            upload=upload,
+            sink=result_path,
+        )
+        duration = time.perf_counter() - start
+        _log_summary(summary)
+        _save_result(
+            pdf_path,
+            result_path,
+            summary,
+            duration,
+            env_name,
+            experiment_label,
+            run_notes,
+            schedule,
+            upload,
+        )
+        return
+
+    def on_complete(job: DoclingJob) -> None:
+        if job.result is not None and job.result_path is not None:
+            _log_summary(job.result)
+            _save_result(
+                job.pdf_path,
+                job.result_path,
+                job.result,
+                job.duration,
+                env_name,
+                experiment_label,
+                run_notes,
+                job.schedule,
+                job.upload,
+            )
+
     start = time.perf_counter()
-    final_result = client.wait_for_completion(
-        pdf_path,
+    jobs = run_batch(
+        client,
+        pdf_paths,
         pdf_settings,
+        concurrency=args.concurrency,
         poll_interval=poll_interval,
         max_attempts=max_attempts,
+        on_complete=on_complete,
+        result_path=lambda path: payload_path("docling", path, experiment_label),
     )
-    duration = time.perf_counter() - start
-    logging.info("Docling final result: %s", json.dumps(final_result, indent=2))
-
-    result_path = save_json_payload("docling", pdf_path, final_result, experiment=experiment_label)
-    metrics_path = append_metrics(
-        "docling",
-        pdf_path,
-        final_result,
-        duration,
-        parser_env=env_name,
-        experiment=experiment_label,
-        extra={"notes": run_notes or env_name},
+    failed = [job for job in jobs if job.error is not None]
+    logging.info(
+        "Docling batch finished: %s/%s succeeded in %.1fs",
+        len(jobs) - len(failed),
+        len(jobs),
+        time.perf_counter() - start,
     )
-    logging.info("Saved Docling payload to %s", result_path)
-    logging.info("Appended Docling metrics to %s", metrics_path)
+    if failed:
+        raise SystemExit(f"{len(failed)} Docling job(s) failed: {[job.pdf_path for job in failed]}")
 
 
 if __name__ == "__main__":
@@ -1,29 +1,115 @@
+import argparse
+import logging
 import os
 import time
+from pathlib import Path
 
+from ..gpt.page_cache import PageCache
+from ..gpt.page_journal import JournalMismatchError, PageJournal
 from ..gpt.page_parser import parse_pdf_document
+from ..gpt.rate_limiter import RateLimiter
+from ..gpt.rendering import RenderOptions
 from ..utils.env import load_env
-from ..utils.result_exporter import append_metrics, save_json_payload
+from ..utils.result_exporter import append_metrics, journal_path, save_json_payload
 
 
 def _str_to_bool(value: str | None) -> bool:
     return (value or "").strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _optional_int(raw_value: str | None, default: int) -> int:
+    if not raw_value:
+        return default
+    try:
+        return int(raw_value)
+    except ValueError:
+        logging.warning("Expected integer but received '%s', falling back to %s", raw_value, default)
+        return default
+
+
+def _optional_float(raw_value: str | None, default: float) -> float:
+    if not raw_value:
+        return default
+    try:
+        return float(raw_value)
+    except ValueError:
+        logging.warning("Expected number but received '%s', falling back to %s", raw_value, default)
+        return default
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Parse a PDF page by page with GPT-5 vision.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse pages from the checkpoint journal and only send missing or failed pages.",
+    )
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        help=(
+            "Checkpoint journal path "
+            "(defaults to data/results/journals/gpt5_<pdf>_<pdf hash>_<RUN_LABEL>.jsonl)."
+        ),
+    )
+    args = parser.parse_args()
+
     load_env()
     pdf_path = (os.getenv("GPT_PARSER_PDF_PATH") or "data/sample.pdf").strip()
     experiment_label = os.getenv("RUN_LABEL")
     run_notes = os.getenv("RUN_NOTES", "")
     image_description = _str_to_bool(os.getenv("GPT_PARSER_IMAGE_DESCRIPTION"))
     extra_instruction = os.getenv("GPT_PARSER_EXTRA_INSTRUCTION")
+    skip_blank_pages = _str_to_bool(os.getenv("GPT_PARSER_SKIP_BLANK", "true"))
+    hybrid = _str_to_bool(os.getenv("GPT_PARSER_HYBRID"))
+    text_layer_min_quality = _optional_float(os.getenv("GPT_PARSER_TEXT_MIN_QUALITY"), default=0.7)
+    concurrency = _optional_int(os.getenv("GPT_PARSER_CONCURRENCY"), default=1)
+    render_workers = _optional_int(os.getenv("GPT_PARSER_RENDER_WORKERS"), default=1)
+    queue_depth = _optional_int(os.getenv("GPT_PARSER_QUEUE_DEPTH"), default=0) or None
+    render_options = RenderOptions(
+        image_format=(os.getenv("GPT_PARSER_IMAGE_FORMAT") or "png").strip().lower(),
+        quality=_optional_int(os.getenv("GPT_PARSER_IMAGE_QUALITY"), default=85),
+        grayscale=_str_to_bool(os.getenv("GPT_PARSER_GRAYSCALE")),
+    )
 
-    start = time.perf_counter()
-    payload = parse_pdf_document(
-        pdf_path,
-        image_description=image_description,
-        additional_instruction=extra_instruction,
+    cache_dir = os.getenv("GPT_PARSER_CACHE_DIR", "data/cache/gpt_pages").strip()
+    cache = None
+    if cache_dir:
+        cache_max_mb = _optional_int(os.getenv("GPT_PARSER_CACHE_MAX_MB"), default=512)
+        cache = PageCache(cache_dir, max_bytes=cache_max_mb * 1024 * 1024)
+
+    rate_limiter = RateLimiter(
+        requests_per_minute=_optional_int(os.getenv("GPT_PARSER_RPM"), default=0) or None,
+        tokens_per_minute=_optional_int(os.getenv("GPT_PARSER_TPM"), default=0) or None,
+        estimated_tokens=_optional_int(os.getenv("GPT_PARSER_TOKENS_PER_PAGE"), default=3000),
+        max_retries=_optional_int(os.getenv("GPT_PARSER_MAX_RETRIES"), default=5),
     )
+
+    journal = PageJournal(
+        args.journal or journal_path("gpt5", pdf_path, experiment_label),
+        resume=args.resume,
+    )
+
+    start = time.perf_counter()
+    with journal:
+        try:
+            payload = parse_pdf_document(
+                pdf_path,
+                image_description=image_description,
+                additional_instruction=extra_instruction,
+                concurrency=concurrency,
+                render_workers=render_workers,
+                queue_depth=queue_depth,
+                render_options=render_options,
+                cache=cache,
+                journal=journal,
+                rate_limiter=rate_limiter,
+                skip_blank_pages=skip_blank_pages,
+                hybrid=hybrid,
+                text_layer_min_quality=text_layer_min_quality,
+            )
+        except JournalMismatchError as exc:
+            parser.error(str(exc))
     duration = time.perf_counter() - start
 
     result_path = save_json_payload("gpt5", pdf_path, payload, experiment=experiment_label)
@@ -39,6 +125,7 @@ def main() -> None:
 
     print(f"Saved GPT-5 payload to {result_path}")
     print(f"Appended GPT-5 metrics to {metrics_path}")
+    print(f"Page journal kept at {journal.path} (rerun with --resume to retry failed pages)")
 
 
 if __name__ == "__main__":
@@ -2,15 +2,27 @@ import json
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from io import BytesIO
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, List
 from urllib.parse import parse_qsl
 
+import pymupdf
 import requests
 
 from ..utils.env import get_env_value, load_env
-from ..utils.result_exporter import append_metrics, save_json_payload
+from ..utils.http import get_session, http_timeout
+from ..utils.multipart import UploadStats, post_multipart
+from ..utils.result_exporter import (
+    STREAM_CHUNK_BYTES,
+    append_metrics,
+    payload_path,
+    record_result,
+    save_stream_payload,
+    summarize_payload,
+)
 
 '''
 LLM Sherpa Parsing CLI
@@ -38,6 +50,10 @@ LLMSHERPA_ENVIRONMENTS = {
 }
 
 
+# Only the passthrough endpoint returns return_dict.result.blocks, which shard merging needs.
+SHARDABLE_ENDPOINT = "passthrough"
+
+
 @dataclass(frozen=True)
 class SherpaSettings:
     preserve_layout: bool = True
@@ -64,30 +80,122 @@ class LLMSherpaClient:
         self.api_key = api_key
         self.endpoint = endpoint.strip("/")
         self.extra_params = extra_params
-        self._session = requests.Session()
+        self._session = get_session()
+
+    def parse_document(
+        self,
+        pdf_path: str | Path,
+        settings: SherpaSettings,
+        upload: UploadStats | None = None,
+    ) -> dict[str, Any]:
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+
+        with pdf_path.open("rb") as pdf_file:
+            return self._post_pdf(pdf_path.name, pdf_file, settings, upload)
 
-    def parse_document(self, pdf_path: str | Path, settings: SherpaSettings) -> dict[str, Any]:
+    def parse_document_to_file(
+        self,
+        pdf_path: str | Path,
+        settings: SherpaSettings,
+        target: Path,
+        upload: UploadStats | None = None,
+    ) -> Path:
+        """Like ``parse_document``, but stream the response body straight into ``target``."""
         pdf_path = Path(pdf_path)
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
+        with pdf_path.open("rb") as pdf_file:
+            response = self._send_pdf(pdf_path.name, pdf_file, settings, upload, stream=True)
+        with response:
+            return save_stream_payload(target, response.iter_content(STREAM_CHUNK_BYTES))
+
+    def parse_document_sharded(
+        self,
+        pdf_path: str | Path,
+        settings: SherpaSettings,
+        max_pages: int | None = None,
+        max_bytes: int | None = None,
+        workers: int = 2,
+        upload: UploadStats | None = None,
+    ) -> dict[str, Any]:
+        """
+        Split the PDF into shards, upload them in parallel and merge the blocks.
+
+        ``upload`` receives the combined transfer stats of all shards.
+        """
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        if self.endpoint.split("/", 1)[0] != SHARDABLE_ENDPOINT:
+            raise ValueError(
+                f"Sharding needs the passthrough endpoint (e.g. passthrough/api/parseDocument), "
+                f"got '{self.endpoint}'; unset LLMSHERPA_SHARD_PAGES/LLMSHERPA_SHARD_MAX_MB"
+            )
+
+        shards = split_pdf(pdf_path, max_pages=max_pages, max_bytes=max_bytes)
+        if not shards:
+            raise ValueError(f"PDF has no pages to shard: {pdf_path}")
+        logging.info(
+            "LLM Sherpa sharding %s into %s shards: %s",
+            pdf_path.name,
+            len(shards),
+            ", ".join(f"p{shard.first_page + 1}-{shard.last_page + 1}" for shard in shards),
+        )
+
+        shard_uploads = [UploadStats() for _ in shards]
+
+        def send(index: int) -> dict[str, Any]:
+            shard = shards[index]
+            name = f"{pdf_path.stem}_p{shard.first_page + 1}-{shard.last_page + 1}.pdf"
+            return self._post_pdf(name, BytesIO(shard.data), settings, shard_uploads[index])
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sherpa-shard") as pool:
+            responses = list(pool.map(send, range(len(shards))))
+        if upload is not None:
+            combined = UploadStats.merge(shard_uploads)
+            upload.bytes_sent = combined.bytes_sent
+            upload.started_at = combined.started_at
+            upload.finished_at = combined.finished_at
+        return merge_shard_results(shards, responses)
+
+    def _post_pdf(
+        self,
+        filename: str,
+        pdf_file: BinaryIO,
+        settings: SherpaSettings,
+        upload: UploadStats | None = None,
+    ) -> dict[str, Any]:
+        return self._send_pdf(filename, pdf_file, settings, upload).json()
+
+    def _send_pdf(
+        self,
+        filename: str,
+        pdf_file: BinaryIO,
+        settings: SherpaSettings,
+        upload: UploadStats | None = None,
+        stream: bool = False,
+    ) -> requests.Response:
         url = f"{self.base_url}/{self.endpoint}"
         headers = {"Accept": "application/json"}
         params = dict(self.extra_params)
         if self.api_key:
             params["API_KEY"] = self.api_key
 
-        with pdf_path.open("rb") as pdf_file:
-            files = {"file": (pdf_path.name, pdf_file, "application/pdf")}
-            data = {"settings": json.dumps(settings.to_payload())}
-            response = self._session.post(
-                url,
-                headers=headers,
-                params=params,
-                data=data,
-                files=files,
-                timeout=int(os.getenv("LLMSHERPA_TIMEOUT", "120")),
-            )
+        response = post_multipart(
+            self._session,
+            url,
+            fields={"settings": json.dumps(settings.to_payload())},
+            filename=filename,
+            fileobj=pdf_file,
+            stats=upload,
+            headers=headers,
+            params=params,
+            timeout=http_timeout(int(os.getenv("LLMSHERPA_TIMEOUT", "120"))),
+            stream=stream,
+        )
 
         try:
             response.raise_for_status()
@@ -96,7 +204,89 @@ class LLMSherpaClient:
             status = exc.response.status_code if exc.response else "unknown"
             logging.error("LLM Sherpa request failed (%s): %s", status, body)
             raise
-        return response.json()
+        return response
+
+
+@dataclass(frozen=True)
+class PdfShard:
+    first_page: int
+    last_page: int
+    data: bytes
+
+
+def _extract_pages(source: pymupdf.Document, first_page: int, last_page: int) -> bytes:
+    shard = pymupdf.open()
+    try:
+        shard.insert_pdf(source, from_page=first_page, to_page=last_page)
+        return shard.tobytes(garbage=3, deflate=True)
+    finally:
+        shard.close()
+
+
+def split_pdf(
+    pdf_path: str | Path,
+    max_pages: int | None = None,
+    max_bytes: int | None = None,
+) -> List[PdfShard]:
+    """
+    Split a PDF into consecutive page ranges of at most ``max_pages`` pages.
+
+    Ranges whose serialized size exceeds ``max_bytes`` are halved until they fit
+    (a single oversized page is kept as its own shard).
+    """
+    shards: List[PdfShard] = []
+    with pymupdf.open(pdf_path) as source:
+        if source.page_count == 0:
+            return shards
+        step = max_pages if max_pages and max_pages > 0 else source.page_count
+        ranges = [
+            (first, min(first + step, source.page_count) - 1)
+            for first in range(0, source.page_count, step)
+        ]
+        while ranges:
+            first, last = ranges.pop(0)
+            data = _extract_pages(source, first, last)
+            if max_bytes and len(data) > max_bytes and last > first:
+                middle = (first + last) // 2
+                ranges[:0] = [(first, middle), (middle + 1, last)]
+                continue
+            shards.append(PdfShard(first_page=first, last_page=last, data=data))
+    return shards
+
+
+def merge_shard_results(shards: List[PdfShard], responses: List[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Combine per-shard passthrough responses into one document-shaped payload.
+
+    ``page_idx`` is shifted by each shard's first page and ``block_idx`` renumbered
+    across shards, so downstream tools see a single document.
+    """
+    if not shards or not responses:
+        raise ValueError("No shard responses to merge")
+    blocks: List[dict[str, Any]] = []
+    for shard, response in zip(shards, responses):
+        try:
+            shard_blocks = response["return_dict"]["result"]["blocks"]
+        except (KeyError, TypeError) as exc:
+            raise RuntimeError(
+                f"LLM Sherpa shard p{shard.first_page + 1}-{shard.last_page + 1} "
+                "returned no return_dict.result.blocks"
+            ) from exc
+        for block in shard_blocks:
+            merged_block = dict(block)
+            if isinstance(block.get("page_idx"), int):
+                merged_block["page_idx"] = block["page_idx"] + shard.first_page
+            merged_block["block_idx"] = len(blocks)
+            blocks.append(merged_block)
+
+    merged = dict(responses[0])
+    merged["return_dict"] = dict(merged["return_dict"])
+    merged["return_dict"]["result"] = dict(merged["return_dict"]["result"], blocks=blocks)
+    merged["shards"] = [
+        {"pages": [shard.first_page + 1, shard.last_page + 1], "bytes": len(shard.data)}
+        for shard in shards
+    ]
+    return merged
 
 
 def main() -> None:
@@ -125,21 +315,46 @@ def main() -> None:
         extra_params,
         experiment_label or "<none>",
     )
+    shard_pages = _optional_int(os.getenv("LLMSHERPA_SHARD_PAGES"), default=0)
+    shard_max_mb = _optional_int(os.getenv("LLMSHERPA_SHARD_MAX_MB"), default=0)
+    upload = UploadStats()
+    result_path = payload_path("llmsherpa", pdf_path, experiment_label)
     start = time.perf_counter()
-    result = client.parse_document(pdf_path, settings)
+    if shard_pages or shard_max_mb:
+        merged = client.parse_document_sharded(
+            pdf_path,
+            settings,
+            max_pages=shard_pages or None,
+            max_bytes=shard_max_mb * 1024 * 1024 or None,
+            workers=_optional_int(os.getenv("LLMSHERPA_SHARD_WORKERS"), default=2),
+            upload=upload,
+        )
+        save_stream_payload(result_path, [json.dumps(merged).encode("utf-8")])
+        summary = summarize_payload(merged)
+    else:
+        client.parse_document_to_file(pdf_path, settings, result_path, upload)
+        summary = summarize_payload(result_path)
     duration = time.perf_counter() - start
-    logging.info("LLM Sherpa response: %s", json.dumps(result, indent=2))
+    logging.info(
+        "LLM Sherpa response: status=%s chunks=%s execution_time=%s",
+        summary["status"] or "<unknown>",
+        summary["chunk_count"],
+        summary["execution_time"] or "<n/a>",
+    )
 
-    result_path = save_json_payload("llmsherpa", pdf_path, result, experiment=experiment_label)
+    record_result("llmsherpa", pdf_path, result_path, experiment_label, summary["chunk_count"])
     metrics_path = append_metrics(
         "llmsherpa",
         pdf_path,
-        result,
+        summary,
         duration,
         parser_env=env_name,
         experiment=experiment_label,
         extra={
             "notes": run_notes or f"{env_name} layout={settings.preserve_layout}",
+            "chunk_count": summary["chunk_count"],
+            "execution_time": summary["execution_time"],
+            **upload.to_metrics(duration),
         },
     )
     logging.info("Saved LLM Sherpa payload to %s", result_path)
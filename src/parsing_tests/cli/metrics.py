@@ -0,0 +1,41 @@
+"""
+Import or export the run metrics database (data/results/metrics.db).
+
+Example:
+    uv run python -m parsing_tests.cli.metrics --export data/results/metrics.csv
+    uv run python -m parsing_tests.cli.metrics --import-csv old_machine/metrics.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from ..utils.result_exporter import metrics_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import/export parser run metrics.")
+    parser.add_argument("--export", type=Path, help="Write the metrics as CSV to this path.")
+    parser.add_argument("--parser", help="Only export rows of this parser (e.g. docling).")
+    parser.add_argument(
+        "--import-csv",
+        type=Path,
+        action="append",
+        help="Merge a metrics CSV into the database; repeatable.",
+    )
+    args = parser.parse_args()
+    if not args.export and not args.import_csv:
+        parser.error("nothing to do: pass --export and/or --import-csv")
+
+    store = metrics_store()
+    for csv_path in args.import_csv or []:
+        count = store.import_csv(csv_path)
+        print(f"Imported {count} rows from {csv_path}")
+    if args.export:
+        store.export_csv(args.export, parser=args.parser)
+        print(f"Exported metrics to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
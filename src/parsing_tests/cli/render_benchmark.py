@@ -0,0 +1,84 @@
+"""
+Benchmark page rasterization formats for the GPT vision parser.
+
+Reports per-page CPU time and base64 payload size for each image format, which
+drive upload latency and vision token cost respectively.
+
+Example:
+    uv run python -m parsing_tests.cli.render_benchmark \
+        --pdf "data/reseau ASF.pdf" --dpi 150 --pages 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import time
+from io import BytesIO
+from pathlib import Path
+from statistics import mean
+from typing import Callable, List, Tuple
+
+import fitz  # type: ignore[attr-defined]
+from PIL import Image
+
+from ..gpt.rendering import RenderOptions, render_page
+
+
+def _legacy_png_b64(page: "fitz.Page", dpi: int) -> str:
+    """Previous path: Pixmap PNG decoded by Pillow and re-encoded to PNG."""
+    pix = page.get_pixmap(dpi=dpi)
+    image = Image.open(BytesIO(pix.tobytes()))
+    buffered = BytesIO()
+    image.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+def _variants(quality: int) -> List[Tuple[str, Callable[["fitz.Page", int], str]]]:
+    variants: List[Tuple[str, Callable[["fitz.Page", int], str]]] = [
+        ("png-legacy", _legacy_png_b64),
+    ]
+    for image_format in ("png", "jpeg", "webp"):
+        for grayscale in (False, True):
+            options = RenderOptions(image_format=image_format, quality=quality, grayscale=grayscale)
+            label = f"{image_format}{'-gray' if grayscale else ''}"
+            variants.append(
+                (label, lambda page, dpi, options=options: render_page(page, dpi, options).image_b64)
+            )
+    return variants
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark page image formats for GPT parsing.")
+    parser.add_argument("--pdf", type=Path, required=True, help="PDF to rasterize.")
+    parser.add_argument("--dpi", type=int, default=150, help="Render resolution.")
+    parser.add_argument("--pages", type=int, default=10, help="Number of leading pages to benchmark.")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG/WebP quality.")
+    args = parser.parse_args()
+
+    if not args.pdf.exists():
+        raise FileNotFoundError(f"PDF not found: {args.pdf}")
+
+    document = fitz.open(str(args.pdf))
+    page_indexes = range(min(args.pages, document.page_count))
+    print(f"{args.pdf} | {len(page_indexes)} pages @ {args.dpi} dpi | quality={args.quality}")
+    print(f"{'format':<12} {'cpu ms/page':>12} {'KiB/page':>10} {'total MiB':>10}")
+    print("-" * 47)
+    for label, encode in _variants(args.quality):
+        cpu_times: List[float] = []
+        sizes: List[int] = []
+        for page_index in page_indexes:
+            page = document.load_page(page_index)
+            start = time.process_time()
+            image_b64 = encode(page, args.dpi)
+            cpu_times.append(time.process_time() - start)
+            sizes.append(len(image_b64))
+        print(
+            f"{label:<12} {mean(cpu_times) * 1000:>12.1f} {mean(sizes) / 1024:>10.1f} "
+            f"{sum(sizes) / (1024 * 1024):>10.2f}"
+        )
+    document.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Per-page checkpoint journal so long GPT runs can resume after a failure."""
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+ERROR_PLACEHOLDER_PREFIX = "<!-- Error parsing page"
+
+
+def is_error_content(content: str) -> bool:
+    return content.lstrip().startswith(ERROR_PLACEHOLDER_PREFIX)
+
+
+class JournalMismatchError(ValueError):
+    """The journal was written for another PDF or with other parsing settings."""
+
+
+class PageJournal:
+    """
+    Append-only JSONL file with one ``{"page", "content"}`` line per finished page.
+
+    Opened with ``resume=True`` the existing journal is kept and ``completed`` holds
+    the pages that parsed successfully (the last entry per page wins); failed pages
+    are left out so they get sent again. Otherwise the journal starts empty.
+
+    The first line is a ``{"settings": ...}`` header written by ``bind_settings``;
+    resuming under different settings (or another PDF) is refused.
+    """
+
+    def __init__(self, path: str | Path, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.settings: Dict[str, Any] | None = None
+        self._has_pages = False
+        self.completed: Dict[int, dict] = self._load() if resume else {}
+        self._lock = threading.Lock()
+        self._handle = self.path.open("a" if resume else "w", encoding="utf-8")
+        if resume and not self._ends_with_newline():
+            self._handle.write("\n")
+
+    def bind_settings(self, settings: Dict[str, Any]) -> None:
+        """Write the settings header, or check it against a resumed journal's."""
+        if self.settings is not None:
+            changed = sorted(
+                key
+                for key in settings.keys() | self.settings.keys()
+                if settings.get(key) != self.settings.get(key)
+            )
+            if changed:
+                raise JournalMismatchError(
+                    f"{self.path} was written with different settings ({', '.join(changed)}); "
+                    "run without --resume or pass another --journal"
+                )
+            return
+        if self._has_pages:
+            raise JournalMismatchError(
+                f"{self.path} has no settings header, so its pages cannot be matched to this "
+                "run; run without --resume or pass another --journal"
+            )
+        self.settings = dict(settings)
+        self.record({"settings": self.settings})
+
+    def record(self, chunk: dict) -> None:
+        line = json.dumps(chunk, ensure_ascii=False)
+        with self._lock:
+            self._handle.write(line + "\n")
+            self._handle.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._handle.close()
+
+    def __enter__(self) -> "PageJournal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _ends_with_newline(self) -> bool:
+        with self.path.open("rb") as journal_file:
+            if journal_file.seek(0, 2) == 0:
+                return True
+            journal_file.seek(-1, 2)
+            return journal_file.read(1) == b"\n"
+
+    def _load(self) -> Dict[int, dict]:
+        entries: Dict[int, dict] = {}
+        if not self.path.exists():
+            return entries
+        with self.path.open(encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    chunk = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write can leave a truncated last line.
+                    continue
+                if "settings" in chunk and "page" not in chunk:
+                    self.settings = chunk["settings"]
+                    continue
+                self._has_pages = True
+                entries[int(chunk["page"])] = chunk
+        return {
+            page: chunk
+            for page, chunk in entries.items()
+            if not is_error_content(chunk.get("content", ""))
+        }
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
-import base64
-from io import BytesIO
+import hashlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterable, List
 
 import fitz  # type: ignore[attr-defined]
-from PIL import Image
 
 from ..config import (
     azure_openai_client,
     azure_openai_gpt5_deployment,
     logger,
 )
+from ..utils.results_catalog import file_sha256
+from .page_cache import PageCache
+from .page_journal import PageJournal
+from .page_triage import BLANK, TEXT_LAYER, PageTriage, count_classes, triage_document
+from .rate_limiter import RateLimiter
+from .rendering import RenderedPage, RenderOptions, iter_rendered_pages
+from .text_layer import extract_text_layer
 
 
 def _build_system_instruction(image_description: bool, extra: str | None = None) -> str:
@@ -41,13 +47,39 @@ def _build_system_instruction(image_description: bool, extra: str | None = None)
     return system_instruction
 
 
+def _journal_settings(
+    pdf_path: Path,
+    dpi: int,
+    system_instruction: str,
+    render_options: RenderOptions,
+    hybrid: bool,
+    text_layer_min_quality: float,
+) -> Dict[str, Any]:
+    """Everything that shapes a page's Markdown; journaled pages are only reused if it matches."""
+    return {
+        "pdf_sha256": file_sha256(pdf_path),
+        "deployment": azure_openai_gpt5_deployment or "",
+        "dpi": dpi,
+        "instruction_sha256": hashlib.sha256(system_instruction.encode("utf-8")).hexdigest(),
+        "image_format": render_options.image_format,
+        "quality": render_options.quality,
+        "grayscale": render_options.grayscale,
+        "text_layer_min_quality": text_layer_min_quality if hybrid else None,
+    }
+
+
 def parse_pdf_page(
     image_b64: str,
     image_description: bool = False,
     additional_instruction: str | None = None,
+    mime_type: str = "image/png",
+    rate_limiter: RateLimiter | None = None,
 ) -> str:
     """
-    Sends a base64 encoded PNG page to the GPT-5 deployment and returns Markdown text.
+    Sends a base64 encoded page image to the GPT-5 deployment and returns Markdown text.
+
+    With a ``rate_limiter`` the call waits for the shared request/token budgets and
+    throttled or transient failures are retried by the limiter instead of the SDK.
     """
     if azure_openai_client is None or not azure_openai_gpt5_deployment:
         raise RuntimeError("Azure OpenAI client or deployment name not configured.")
@@ -60,77 +92,266 @@ def parse_pdf_page(
         "Parse the attached PDF page and return the Markdown content exactly as written."
     )
 
-    response = azure_openai_client.chat.completions.create(
-        model=azure_openai_gpt5_deployment,
-        messages=[
-            {"role": "system", "content": system_instruction},
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{image_b64}"},
-                    },
-                    {
-                        "type": "text",
-                        "text": user_message,
-                    },
-                ],
-            },
-        ],
-    )
+    messages = [
+        {"role": "system", "content": system_instruction},
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:{mime_type};base64,{image_b64}"},
+                },
+                {
+                    "type": "text",
+                    "text": user_message,
+                },
+            ],
+        },
+    ]
+    if rate_limiter is None:
+        response = azure_openai_client.chat.completions.create(
+            model=azure_openai_gpt5_deployment,
+            messages=messages,
+        )
+    else:
+        client = azure_openai_client.with_options(max_retries=0)
+        response = rate_limiter.call(
+            lambda: client.chat.completions.create(
+                model=azure_openai_gpt5_deployment,
+                messages=messages,
+            )
+        )
     choice = response.choices[0].message.content
     return choice or ""
 
 
+def _parse_page_chunk(
+    rendered: RenderedPage,
+    image_description: bool,
+    additional_instruction: str | None,
+    cache: PageCache | None = None,
+    cache_key: str | None = None,
+    rate_limiter: RateLimiter | None = None,
+) -> dict:
+    try:
+        content = parse_pdf_page(
+            image_b64=rendered.image_b64,
+            image_description=image_description,
+            additional_instruction=additional_instruction,
+            mime_type=rendered.mime_type,
+            rate_limiter=rate_limiter,
+        )
+    except Exception as exc:  # pragma: no cover - remote failures
+        logger.error("Failed to parse page %s: %s", rendered.page_number, exc)
+        content = f"<!-- Error parsing page {rendered.page_number}: {exc} -->"
+    else:
+        if cache is not None and cache_key is not None:
+            cache.put(cache_key, content)
+
+    return {
+        "page": rendered.page_number,
+        "content": content.strip(),
+    }
+
+
+def _collect_chunks(
+    futures: Iterable[Future],
+    results: Dict[int, dict],
+    journal: PageJournal | None = None,
+) -> None:
+    for future in futures:
+        chunk = future.result()
+        results[chunk["page"]] = chunk
+        if journal is not None:
+            journal.record(chunk)
+
+
 def parse_pdf_document(
     pdf_path: str | Path,
     *,
     dpi: int = 150,
     image_description: bool = False,
     additional_instruction: str | None = None,
+    concurrency: int = 1,
+    render_workers: int = 1,
+    queue_depth: int | None = None,
+    render_options: RenderOptions | None = None,
+    cache: PageCache | None = None,
+    journal: PageJournal | None = None,
+    rate_limiter: RateLimiter | None = None,
+    skip_blank_pages: bool = False,
+    hybrid: bool = False,
+    text_layer_min_quality: float = 0.7,
 ) -> dict:
     """
     Converts a PDF into Markdown chunks by sending each page through GPT-5 vision.
+
+    Pages are rasterized by ``render_workers`` processes into a queue holding at most
+    ``queue_depth`` encoded pages (default: twice ``concurrency``), while up to
+    ``concurrency`` page requests are kept in flight. Chunks are always returned in
+    page order. ``render_options`` selects the image format (PNG by default, or
+    JPEG/WebP with a quality setting) and grayscale rendering.
+
+    When a ``cache`` is given, pages whose image, system instruction, deployment and
+    DPI were transcribed before are served locally and only misses are sent.
+
+    When a ``journal`` is given, every finished page is appended to it as it
+    completes, and pages the journal already holds (see ``PageJournal(resume=True)``)
+    are reused instead of being rendered and sent again. A resumed journal written
+    for another PDF, deployment, DPI, instruction or image setting raises
+    ``JournalMismatchError``.
+
+    A shared ``rate_limiter`` keeps the concurrent requests within the deployment's
+    requests/tokens per minute and retries throttled calls.
+
+    With ``skip_blank_pages`` a cheap pre-pass classifies every page as blank,
+    text-layer-present or image-only; blank pages get no vision call and no chunk.
+
+    With ``hybrid`` each page's text layer is extracted locally first and pages
+    scoring at least ``text_layer_min_quality`` keep that Markdown (tagged
+    ``"source": "text_layer"``); only the remaining pages go through GPT-5 vision.
     """
     pdf_path = Path(pdf_path)
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
-    logger.info("Parsing %s with GPT-5 (dpi=%s)", pdf_path, dpi)
-    document = fitz.open(str(pdf_path))
-    chunks: List[dict] = []
-
-    for page_index in range(document.page_count):
-        page_number = page_index + 1
-        page = document.load_page(page_index)
-        pix = page.get_pixmap(dpi=dpi)
-        image = Image.open(BytesIO(pix.tobytes()))
-        buffered = BytesIO()
-        image.save(buffered, format="PNG")
-        image_b64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-        try:
-            content = parse_pdf_page(
-                image_b64=image_b64,
-                image_description=image_description,
-                additional_instruction=additional_instruction,
+    render_options = render_options or RenderOptions()
+    concurrency = max(1, concurrency)
+    queue_depth = max(1, queue_depth or 2 * concurrency)
+    logger.info(
+        "Parsing %s with GPT-5 (dpi=%s, %s, concurrency=%s, render_workers=%s, queue_depth=%s)",
+        pdf_path,
+        dpi,
+        render_options,
+        concurrency,
+        render_workers,
+        queue_depth,
+    )
+    system_instruction = _build_system_instruction(image_description, additional_instruction)
+    if journal is not None:
+        journal.bind_settings(
+            _journal_settings(
+                pdf_path, dpi, system_instruction, render_options, hybrid, text_layer_min_quality
             )
-        except Exception as exc:  # pragma: no cover - remote failures
-            logger.error("Failed to parse page %s: %s", page_number, exc)
-            content = f"<!-- Error parsing page {page_number}: {exc} -->"
-
-        chunks.append(
-            {
-                "page": page_number,
-                "content": content.strip(),
-            }
         )
+    results: Dict[int, dict] = {}
+    triage: List[PageTriage] = []
+    text_layer_pages: List[int] = []
+    resumed_pages = 0
+    with fitz.open(str(pdf_path)) as document:
+        page_count = document.page_count
+        if journal is not None and journal.completed:
+            results.update(
+                (page, chunk) for page, chunk in journal.completed.items() if page <= page_count
+            )
+            resumed_pages = len(results)
+            logger.info(
+                "Resuming: %s/%s pages already in %s", resumed_pages, page_count, journal.path
+            )
+        if skip_blank_pages:
+            triage = triage_document(document)
+        skipped_pages = {entry.page_number for entry in triage if entry.page_class == BLANK}
+        if skipped_pages:
+            logger.info("Skipping %s blank pages: %s", len(skipped_pages), sorted(skipped_pages))
+        if hybrid:
+            candidates: Iterable[int] = range(page_count)
+            if triage:
+                # Image-only pages have no text layer worth scoring.
+                candidates = [
+                    entry.page_number - 1 for entry in triage if entry.page_class == TEXT_LAYER
+                ]
+            for page_index in candidates:
+                if page_index + 1 in results:
+                    continue
+                extracted = extract_text_layer(document.load_page(page_index))
+                if extracted.quality < text_layer_min_quality:
+                    continue
+                chunk = {
+                    "page": extracted.page_number,
+                    "content": extracted.markdown.strip(),
+                    "source": "text_layer",
+                }
+                results[extracted.page_number] = chunk
+                text_layer_pages.append(extracted.page_number)
+                if journal is not None:
+                    journal.record(chunk)
+            logger.info(
+                "Text layer accepted for %s/%s pages", len(text_layer_pages), page_count
+            )
+    deployment = azure_openai_gpt5_deployment or ""
+
+    rendered_pages = iter_rendered_pages(
+        pdf_path,
+        [
+            page_index
+            for page_index in range(page_count)
+            if page_index + 1 not in results and page_index + 1 not in skipped_pages
+        ],
+        dpi=dpi,
+        options=render_options,
+        workers=render_workers,
+        queue_depth=queue_depth,
+    )
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gpt-page") as executor:
+        in_flight: set[Future] = set()
+        for rendered in rendered_pages:
+            cache_key = None
+            if cache is not None:
+                cache_key = PageCache.make_key(
+                    rendered.image_b64, system_instruction, deployment, dpi
+                )
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    chunk = {"page": rendered.page_number, "content": cached.strip()}
+                    results[rendered.page_number] = chunk
+                    if journal is not None:
+                        journal.record(chunk)
+                    continue
+            # Wait for a free slot so at most `concurrency` requests are outstanding;
+            # the render stage keeps filling its queue in the meantime.
+            if len(in_flight) >= concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                _collect_chunks(done, results, journal)
+            in_flight.add(
+                executor.submit(
+                    _parse_page_chunk,
+                    rendered,
+                    image_description,
+                    additional_instruction,
+                    cache,
+                    cache_key,
+                    rate_limiter,
+                )
+            )
+        _collect_chunks(in_flight, results, journal)
 
+    chunks: List[dict] = [results[page_number] for page_number in sorted(results)]
+    meta = {
+        "page_count": page_count,
+        "concurrency": concurrency,
+        "render_workers": render_workers,
+        "image_format": render_options.image_format,
+        "grayscale": render_options.grayscale,
+    }
+    if triage:
+        meta["page_classes"] = count_classes(triage)
+        meta["skipped_pages"] = sorted(skipped_pages)
+    if hybrid:
+        meta["text_layer_pages"] = len(text_layer_pages)
+        meta["text_layer_min_quality"] = text_layer_min_quality
+    if journal is not None:
+        meta["resumed_pages"] = resumed_pages
+    if rate_limiter is not None:
+        meta["rate_limit"] = rate_limiter.stats
+    if cache is not None:
+        meta["cache"] = cache.stats
+        logger.info(
+            "Page cache: %s hits, %s misses", meta["cache"]["hits"], meta["cache"]["misses"]
+        )
     payload = {
         "parser": "gpt-5",
         "pdf_path": str(pdf_path),
-        "meta": {"page_count": document.page_count},
+        "meta": meta,
         "chunks": chunks,
         "status": "completed",
     }
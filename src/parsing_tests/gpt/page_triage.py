@@ -0,0 +1,71 @@
+"""Cheap per-page pre-pass that spots blank pages before any vision call."""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List
+
+import fitz  # type: ignore[attr-defined]
+
+BLANK = "blank"
+TEXT_LAYER = "text"
+IMAGE_ONLY = "image"
+PAGE_CLASSES = (BLANK, TEXT_LAYER, IMAGE_ONLY)
+
+
+@dataclass(frozen=True)
+class PageTriage:
+    page_number: int
+    page_class: str
+    text_chars: int
+    ink_ratio: float
+
+
+def _dark_bytes(ink_threshold: int) -> bytes:
+    return bytes(range(ink_threshold))
+
+
+def classify_page(
+    page: "fitz.Page",
+    *,
+    dpi: int = 24,
+    min_text_chars: int = 20,
+    blank_ink_ratio: float = 0.002,
+    ink_threshold: int = 230,
+) -> PageTriage:
+    """
+    Classify a page as blank, text-layer-present or image-only.
+
+    Pages with at least ``min_text_chars`` non-space characters in their text layer
+    are ``text``. Otherwise a low-DPI grayscale render decides: if at most
+    ``blank_ink_ratio`` of its pixels are darker than ``ink_threshold`` the page is
+    ``blank``, else ``image`` (scans, signatures, figures).
+    """
+    text_chars = len("".join(page.get_text("text").split()))
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    samples = pix.samples
+    # Deleting every dark byte leaves the light pixels; the difference is the ink.
+    light = samples.translate(None, _dark_bytes(ink_threshold))
+    ink_ratio = (len(samples) - len(light)) / len(samples) if samples else 0.0
+
+    if text_chars >= min_text_chars:
+        page_class = TEXT_LAYER
+    elif ink_ratio <= blank_ink_ratio:
+        page_class = BLANK
+    else:
+        page_class = IMAGE_ONLY
+    return PageTriage(
+        page_number=page.number + 1,
+        page_class=page_class,
+        text_chars=text_chars,
+        ink_ratio=ink_ratio,
+    )
+
+
+def triage_document(document: "fitz.Document") -> List[PageTriage]:
+    return [classify_page(page) for page in document]
+
+
+def count_classes(triage: List[PageTriage]) -> Dict[str, int]:
+    counts = Counter(entry.page_class for entry in triage)
+    return {page_class: counts.get(page_class, 0) for page_class in PAGE_CLASSES}
@@ -0,0 +1,193 @@
+"""Client-side rate limiting and retry scheduling for Azure OpenAI calls."""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+try:
+    import openai
+except Exception:  # pragma: no cover - SDK might not be available in CI
+    openai = None  # type: ignore[assignment]
+
+logger = logging.getLogger("parsing_tests")
+
+T = TypeVar("T")
+
+if openai is not None:
+    RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+else:  # pragma: no cover - SDK missing
+    RETRYABLE_ERRORS = (TimeoutError, ConnectionError)
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously; may go negative after a correction."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # Requests larger than the whole budget only wait for a full bucket.
+        missing = min(amount, self.capacity) - self.available
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float) -> None:
+        self.available -= amount
+
+
+class RateLimiter:
+    """
+    Shared requests-per-minute and tokens-per-minute limiter with retries.
+
+    ``call`` waits for both budgets, runs the request and retries throttled or
+    transient failures with jittered exponential backoff, honouring ``retry-after``
+    headers. A 429 pauses every caller sharing the limiter, so concurrent page
+    requests back off together instead of piling into the same quota window.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        *,
+        estimated_tokens: int = 3000,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.estimated_tokens = estimated_tokens
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._counters: Dict[str, float] = {
+            "calls": 0,
+            "throttled": 0,
+            "retried": 0,
+            "failed": 0,
+            "limiter_wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+        }
+
+    def acquire(self, tokens: int) -> None:
+        """Block until one request and ``tokens`` fit within both budgets."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                    if bucket is not None:
+                        bucket.refill(now)
+                        wait = max(wait, bucket.wait_time(amount))
+                if wait <= 0:
+                    if self.requests is not None:
+                        self.requests.consume(1)
+                    if self.tokens is not None:
+                        self.tokens.consume(tokens)
+                    return
+                self._counters["limiter_wait_seconds"] += wait
+            time.sleep(wait)
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token budget once the real usage of a request is known."""
+        if self.tokens is None or actual is None:
+            return
+        with self._lock:
+            self.tokens.consume(actual - estimated)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def call(self, request: Callable[[], T], estimated_tokens: Optional[int] = None) -> T:
+        estimated = estimated_tokens or self.estimated_tokens
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated)
+            with self._lock:
+                self._counters["calls"] += 1
+            try:
+                response = request()
+            except RETRYABLE_ERRORS as exc:
+                throttled = openai is not None and isinstance(exc, openai.RateLimitError)
+                with self._lock:
+                    if throttled:
+                        self._counters["throttled"] += 1
+                    if attempt == self.max_retries:
+                        self._counters["failed"] += 1
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(exc, attempt)
+                with self._lock:
+                    self._counters["retried"] += 1
+                    self._counters["backoff_seconds"] += delay
+                if throttled:
+                    self.pause(delay)
+                logger.warning(
+                    "%s on attempt %s/%s; retrying in %.1fs",
+                    type(exc).__name__,
+                    attempt + 1,
+                    self.max_retries + 1,
+                    delay,
+                )
+                time.sleep(delay)
+                continue
+            usage = getattr(response, "usage", None)
+            self.settle(estimated, getattr(usage, "total_tokens", None))
+            return response
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        for key in ("limiter_wait_seconds", "backoff_seconds"):
+            stats[key] = round(stats[key], 2)
+        return stats
+
+    def _retry_delay(self, exc: BaseException, attempt: int) -> float:
+        retry_after = _retry_after_seconds(exc)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) * random.uniform(1.0, 1.1)
+        return min(self.max_delay, self.base_delay * 2**attempt) * random.uniform(0.5, 1.0)
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,128 @@
+"""Page rasterization stage for the GPT vision parser."""
+from __future__ import annotations
+
+import base64
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from itertools import islice
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, Optional
+
+import fitz  # type: ignore[attr-defined]
+from PIL import Image
+
+IMAGE_MIME_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    image_format: str = "png"
+    quality: int = 85
+    grayscale: bool = False
+
+    def __post_init__(self) -> None:
+        if self.image_format not in IMAGE_MIME_TYPES:
+            raise ValueError(
+                f"Unsupported image format '{self.image_format}'; "
+                f"expected one of {sorted(IMAGE_MIME_TYPES)}"
+            )
+
+    @property
+    def mime_type(self) -> str:
+        return IMAGE_MIME_TYPES[self.image_format]
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    page_number: int
+    image_b64: str
+    mime_type: str = "image/png"
+
+
+def encode_pixmap(pix: "fitz.Pixmap", options: RenderOptions) -> bytes:
+    """Encode Pixmap samples straight into the requested format (no PNG round trip)."""
+    if options.image_format == "png":
+        return pix.tobytes("png")
+    if options.image_format == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=options.quality)
+    # MuPDF has no WebP writer, so hand the raw samples to Pillow.
+    mode = "L" if pix.n == 1 else "RGB"
+    image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+    buffered = BytesIO()
+    image.save(buffered, format="WEBP", quality=options.quality)
+    return buffered.getvalue()
+
+
+def render_page(
+    page: "fitz.Page",
+    dpi: int,
+    options: RenderOptions = RenderOptions(),
+) -> RenderedPage:
+    colorspace = fitz.csGRAY if options.grayscale else fitz.csRGB
+    pix = page.get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False)
+    return RenderedPage(
+        page_number=page.number + 1,
+        image_b64=base64.b64encode(encode_pixmap(pix, options)).decode("ascii"),
+        mime_type=options.mime_type,
+    )
+
+
+# PyMuPDF is not thread-safe, so each render process keeps its own document handle.
+_worker_document: Optional["fitz.Document"] = None
+
+
+def _init_render_worker(pdf_path: str) -> None:
+    global _worker_document
+    _worker_document = fitz.open(pdf_path)
+
+
+def _render_in_worker(page_index: int, dpi: int, options: RenderOptions) -> RenderedPage:
+    assert _worker_document is not None, "render worker not initialised"
+    return render_page(_worker_document.load_page(page_index), dpi, options)
+
+
+def iter_rendered_pages(
+    pdf_path: str | Path,
+    page_indexes: Iterable[int],
+    *,
+    dpi: int,
+    options: RenderOptions = RenderOptions(),
+    workers: int = 1,
+    queue_depth: int = 4,
+) -> Iterator[RenderedPage]:
+    """
+    Yields rendered pages in page order while ``workers`` processes render ahead.
+
+    At most ``queue_depth`` pages are rendered but not yet consumed, so memory stays
+    bounded regardless of the page count. ``workers=0`` renders inline instead.
+    """
+    if workers <= 0:
+        document = fitz.open(str(pdf_path))
+        try:
+            for page_index in page_indexes:
+                yield render_page(document.load_page(page_index), dpi, options)
+        finally:
+            document.close()
+        return
+
+    indexes = iter(page_indexes)
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_render_worker,
+        initargs=(str(pdf_path),),
+    ) as executor:
+        for page_index in islice(indexes, max(1, queue_depth)):
+            pending.append(executor.submit(_render_in_worker, page_index, dpi, options))
+        while pending:
+            rendered = pending.popleft().result()
+            next_index = next(indexes, None)
+            if next_index is not None:
+                pending.append(executor.submit(_render_in_worker, next_index, dpi, options))
+            yield rendered
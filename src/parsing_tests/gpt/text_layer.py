@@ -0,0 +1,152 @@
+"""Local text-layer extraction used as a fast path before GPT vision."""
+from __future__ import annotations
+
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import List
+
+import fitz  # type: ignore[attr-defined]
+
+# Non-space characters per square inch at which a page counts as fully text-bearing;
+# a dense contract page sits around 15-25.
+TARGET_CHAR_DENSITY = 8.0
+# Blocks this close to the top/bottom edge and this short are headers/footers.
+MARGIN_RATIO = 0.06
+MARGIN_MAX_CHARS = 80
+BOLD_FLAG = 16
+
+
+@dataclass(frozen=True)
+class TextLayerPage:
+    page_number: int
+    markdown: str
+    quality: float
+    char_density: float
+    garbled_ratio: float
+    has_tables: bool
+    image_coverage: float
+
+
+def _is_garbled(char: str) -> bool:
+    if char == "\ufffd":
+        return True
+    category = unicodedata.category(char)
+    # Private-use glyphs and stray control codes mean the font has no usable ToUnicode map.
+    return category == "Co" or (category == "Cc" and char not in "\n\t")
+
+
+def _span_markdown(span: dict) -> str:
+    text = span.get("text", "")
+    if span.get("flags", 0) & BOLD_FLAG and text.strip():
+        stripped = text.strip()
+        return text.replace(stripped, f"**{stripped}**", 1)
+    return text
+
+
+def _block_lines(block: dict) -> List[str]:
+    lines = []
+    for line in block.get("lines", []):
+        text = "".join(_span_markdown(span) for span in line.get("spans", [])).strip()
+        if text:
+            lines.append(text)
+    return lines
+
+
+def _join_lines(lines: List[str]) -> str:
+    paragraph = ""
+    for line in lines:
+        if paragraph.endswith("-") and not paragraph.endswith(" -"):
+            paragraph = paragraph[:-1] + line
+        elif paragraph:
+            paragraph += " " + line
+        else:
+            paragraph = line
+    return paragraph
+
+
+def _body_font_size(blocks: List[dict]) -> float:
+    sizes: Counter = Counter()
+    for block in blocks:
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                sizes[round(span.get("size", 0.0), 1)] += len(span.get("text", "").strip())
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+def _heading_prefix(block: dict, body_size: float, text: str) -> str:
+    if not body_size or len(text) > 200:
+        return ""
+    size = max(
+        (span.get("size", 0.0) for line in block.get("lines", []) for span in line.get("spans", [])),
+        default=0.0,
+    )
+    if size >= body_size * 1.5:
+        return "# "
+    if size >= body_size * 1.15:
+        return "## "
+    return ""
+
+
+def _has_tables(page: "fitz.Page") -> bool:
+    if not hasattr(page, "find_tables"):
+        return False
+    try:
+        return bool(page.find_tables().tables)
+    except Exception:  # pragma: no cover - table finder failures are not fatal
+        return False
+
+
+def extract_text_layer(page: "fitz.Page") -> TextLayerPage:
+    """
+    Render the page's text layer as Markdown and score how trustworthy it is.
+
+    ``quality`` is in [0, 1]: it drops with sparse text, garbled glyphs, tables
+    (whose layout the text layer does not carry) and large images (which vision
+    would describe or skip deliberately).
+    """
+    data = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+    page_rect = page.rect
+    top_margin = page_rect.y0 + page_rect.height * MARGIN_RATIO
+    bottom_margin = page_rect.y1 - page_rect.height * MARGIN_RATIO
+
+    text_blocks = [block for block in data.get("blocks", []) if block.get("type") == 0]
+    body_size = _body_font_size(text_blocks)
+    paragraphs: List[str] = []
+    for block in text_blocks:
+        text = _join_lines(_block_lines(block))
+        if not text:
+            continue
+        _, y0, _, y1 = block["bbox"]
+        if len(text) <= MARGIN_MAX_CHARS and (y1 <= top_margin or y0 >= bottom_margin):
+            continue
+        paragraphs.append(_heading_prefix(block, body_size, text) + text)
+    markdown = "\n\n".join(paragraphs)
+
+    chars = [char for char in markdown if not char.isspace()]
+    area_sq_in = (page_rect.width / 72.0) * (page_rect.height / 72.0) or 1.0
+    char_density = len(chars) / area_sq_in
+    garbled_ratio = sum(1 for char in chars if _is_garbled(char)) / len(chars) if chars else 1.0
+
+    image_area = 0.0
+    for image in page.get_image_info():
+        image_area += abs(fitz.Rect(image["bbox"]) & page_rect)
+    image_coverage = min(1.0, image_area / abs(page_rect)) if abs(page_rect) else 0.0
+    has_tables = _has_tables(page)
+
+    quality = min(1.0, char_density / TARGET_CHAR_DENSITY)
+    quality *= max(0.0, 1.0 - garbled_ratio * 10)
+    if has_tables:
+        quality *= 0.5
+    if image_coverage > 0.3:
+        quality *= 0.5
+
+    return TextLayerPage(
+        page_number=page.number + 1,
+        markdown=markdown,
+        quality=round(quality, 3),
+        char_density=round(char_density, 2),
+        garbled_ratio=round(garbled_ratio, 4),
+        has_tables=has_tables,
+        image_coverage=round(image_coverage, 3),
+    )
@@ -0,0 +1,256 @@
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("parsing_tests.http")
+
+RETRY_STATUSES = (502, 503, 504)
+
+
+@dataclass
+class RequestTiming:
+    """
+    Wall-clock breakdown of one request, in seconds.
+
+    ``upload`` is the time spent streaming a ``MultipartStream`` body; ``ttfb`` is
+    what remains until the response headers, i.e. the server's own time.
+    """
+
+    dns: float = 0.0
+    connect: float = 0.0
+    tls: float = 0.0
+    upload: float = 0.0
+    ttfb: float = 0.0
+    transfer: float = 0.0
+    total: float = 0.0
+    new_connection: bool = False
+    retries: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"dns={self.dns * 1000:.0f}ms connect={self.connect * 1000:.0f}ms "
+            f"tls={self.tls * 1000:.0f}ms upload={self.upload * 1000:.0f}ms "
+            f"ttfb={self.ttfb * 1000:.0f}ms "
+            f"transfer={self.transfer * 1000:.0f}ms total={self.total * 1000:.0f}ms "
+            f"{'new' if self.new_connection else 'reused'} conn, retries={self.retries}"
+        )
+
+
+# The timing of the request currently being sent on this thread, filled in by the
+# connection classes below (urllib3 gives no hook between DNS, TCP and TLS).
+_active = threading.local()
+
+
+def _active_timing() -> RequestTiming | None:
+    return getattr(_active, "timing", None)
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):  # type: ignore[no-untyped-def]
+        timing = _active_timing()
+        if timing is None:
+            return super()._new_conn()  # type: ignore[misc]
+        timing.new_connection = True
+        host = self._dns_host  # type: ignore[attr-defined]
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(
+                host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM  # type: ignore[attr-defined]
+            )
+        except OSError:
+            addresses = []  # let the real connect raise the proper urllib3 error
+        resolved = time.perf_counter()
+        timing.dns += resolved - start
+        try:
+            return self._connect_resolved(host, addresses)
+        finally:
+            timing.connect += time.perf_counter() - resolved
+
+    def _connect_resolved(self, host: str, addresses: list) -> socket.socket:
+        # Connect to the addresses resolved above, in order, so the host is looked up
+        # only once; TLS still verifies and sends SNI for self.host.
+        if not addresses:
+            return super()._new_conn()  # type: ignore[misc]
+        error: Exception | None = None
+        try:
+            for *_, sockaddr in addresses:
+                self._dns_host = sockaddr[0]
+                try:
+                    return super()._new_conn()  # type: ignore[misc]
+                except (ConnectTimeoutError, NewConnectionError) as exc:
+                    error = exc
+        finally:
+            self._dns_host = host
+        raise error  # type: ignore[misc]
+
+    def connect(self) -> None:
+        timing = _active_timing()
+        if timing is None:
+            return super().connect()  # type: ignore[misc]
+        before = timing.dns + timing.connect
+        start = time.perf_counter()
+        try:
+            return super().connect()  # type: ignore[misc]
+        finally:
+            # Whatever connect() spent beyond socket setup is the TLS handshake.
+            elapsed = time.perf_counter() - start
+            timing.tls += max(0.0, elapsed - (timing.dns + timing.connect - before))
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools record DNS/connect/TLS/upload/TTFB per request."""
+
+    def init_poolmanager(self, *args, **kwargs):  # type: ignore[no-untyped-def]
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):  # type: ignore[no-untyped-def]
+        timing = RequestTiming()
+        _active.timing = timing
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            _active.timing = None
+        headers_at = time.perf_counter()
+        timing.total = headers_at - start
+        upload = getattr(request.body, "stats", None)  # MultipartStream bodies time their upload
+        if upload is not None:
+            timing.upload = upload.upload_seconds
+        timing.ttfb = max(
+            0.0, timing.total - timing.dns - timing.connect - timing.tls - timing.upload
+        )
+        retries = getattr(response.raw, "retries", None)
+        timing.retries = len(retries.history) if retries is not None else 0
+        response.timing = timing
+        response.headers_received_at = headers_at
+        return response
+
+
+class TimedSession(requests.Session):
+    """Session that completes ``response.timing`` once the body has been read."""
+
+    def send(self, request, **kwargs):  # type: ignore[no-untyped-def]
+        response = super().send(request, **kwargs)
+        timing = getattr(response, "timing", None)
+        if timing is not None and not kwargs.get("stream"):
+            # Non-streamed bodies are read inside Session.send, right after the headers.
+            timing.transfer = time.perf_counter() - response.headers_received_at
+            timing.total += timing.transfer
+        if timing is not None:
+            logger.debug(
+                "%s %s -> %s | %s",
+                request.method,
+                request.url.split("?", 1)[0],  # never log API keys from the query string
+                response.status_code,
+                timing,
+            )
+        return response
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key) or default)
+    except ValueError:
+        return default
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key) or default)
+    except ValueError:
+        return default
+
+
+def _env_bool(key: str) -> bool:
+    return (os.getenv(key) or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def build_session(
+    pool_size: int | None = None,
+    retries: int | None = None,
+    backoff: float | None = None,
+    retry_posts: bool | None = None,
+) -> requests.Session:
+    """
+    Session with sized keep-alive pools and backoff retries on 502/503/504.
+
+    Connection failures are retried for every method, since nothing was sent yet.
+    Gateway errors are retried for idempotent methods only (status polls and
+    downloads): a 502/503/504 on a POST may come after the server accepted the
+    PDF, and re-sending it would start the parse again. ``retry_posts`` (or
+    PARSER_HTTP_RETRY_POSTS=1) opts POSTs in. Read timeouts are never retried.
+    """
+    pool_size = pool_size or _env_int("PARSER_HTTP_POOL_SIZE", 16)
+    retries = retries if retries is not None else _env_int("PARSER_HTTP_RETRIES", 3)
+    backoff = backoff if backoff is not None else _env_float("PARSER_HTTP_BACKOFF", 1.0)
+    if retry_posts is None:
+        retry_posts = _env_bool("PARSER_HTTP_RETRY_POSTS")
+    allowed_methods = Retry.DEFAULT_ALLOWED_METHODS
+    if retry_posts:
+        allowed_methods = allowed_methods | {"POST"}
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        status=retries,
+        read=0,
+        backoff_factor=backoff,
+        backoff_jitter=backoff / 2,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=allowed_methods,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = TimedHTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = TimedSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_shared_session: requests.Session | None = None
+_shared_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide session so every parser client shares one connection pool."""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = build_session()
+        return _shared_session
+
+
+def http_timeout(read_seconds: float) -> tuple[float, float]:
+    """(connect, read) timeout pair; the connect part comes from PARSER_HTTP_CONNECT_TIMEOUT."""
+    return _env_float("PARSER_HTTP_CONNECT_TIMEOUT", 10.0), read_seconds
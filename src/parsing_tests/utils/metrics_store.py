@@ -0,0 +1,137 @@
+import csv
+import sqlite3
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+METRICS_FIELDS = [
+    "timestamp",
+    "experiment",
+    "parser",
+    "parser_env",
+    "pdf_path",
+    "status",
+    "duration_seconds",
+    "chunk_count",
+    "execution_time",
+    "poll_attempts",
+    "poll_latency_seconds",
+    "upload_bytes",
+    "upload_seconds",
+    "upload_bytes_per_sec",
+    "server_seconds",
+    "notes",
+]
+# A run is identified by these; writing the same key again updates the row.
+KEY_FIELDS = ("parser", "experiment", "pdf_path", "timestamp")
+INDEXED_FIELDS = ("parser", "experiment", "pdf_path", "timestamp")
+BUSY_TIMEOUT_MS = 30_000
+
+
+class MetricsStore:
+    """
+    Run metrics in a SQLite database (WAL mode), one row per parser run.
+
+    Every call uses its own short-lived connection and writes take the write lock
+    up front, so several runner processes can record metrics at once. Values are
+    stored as text, exactly as they appeared in the old ``metrics.csv``; the first
+    open imports ``legacy_csv`` if it exists.
+    """
+
+    def __init__(self, path: str | Path, legacy_csv: str | Path | None = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._create_schema(conn)
+            imported = conn.execute("SELECT value FROM meta WHERE key = 'csv_imported'").fetchone()
+        if imported is None and legacy_csv is not None:
+            if Path(legacy_csv).exists():
+                self.import_csv(legacy_csv)
+            with self._transaction() as conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_imported', '1')")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000)) as conn:
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            yield conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> None:
+        columns = ", ".join(
+            f"{name} TEXT NOT NULL DEFAULT ''" for name in METRICS_FIELDS
+        )
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS metrics (id INTEGER PRIMARY KEY, {columns}, "
+            f"UNIQUE ({', '.join(KEY_FIELDS)}))"
+        )
+        for name in INDEXED_FIELDS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS metrics_{name} ON metrics ({name})")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.commit()
+
+    def upsert(self, row: dict[str, Any]) -> None:
+        self.upsert_many([row])
+
+    def upsert_many(self, rows: Iterable[dict[str, Any]]) -> int:
+        """Insert rows, updating any existing row with the same run key."""
+        names = ", ".join(METRICS_FIELDS)
+        placeholders = ", ".join("?" for _ in METRICS_FIELDS)
+        updates = ", ".join(
+            f"{name} = excluded.{name}" for name in METRICS_FIELDS if name not in KEY_FIELDS
+        )
+        sql = (
+            f"INSERT INTO metrics ({names}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({', '.join(KEY_FIELDS)}) DO UPDATE SET {updates}"
+        )
+        values = [
+            tuple("" if row.get(name) is None else str(row[name]) for name in METRICS_FIELDS)
+            for row in rows
+        ]
+        with self._transaction() as conn:
+            conn.executemany(sql, values)
+        return len(values)
+
+    def rows(
+        self,
+        parser: str | None = None,
+        experiment: str | None = None,
+        pdf_path: str | None = None,
+    ) -> list[dict[str, str]]:
+        """Rows in insertion order, optionally filtered on the indexed columns."""
+        filters = {"parser": parser, "experiment": experiment, "pdf_path": pdf_path}
+        clauses = [f"{name} = ?" for name, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"SELECT {', '.join(METRICS_FIELDS)} FROM metrics{where} ORDER BY id", params
+            )
+            return [dict(zip(METRICS_FIELDS, record)) for record in cursor]
+
+    def import_csv(self, csv_path: str | Path) -> int:
+        """Upsert the rows of a metrics CSV (any subset of the known columns)."""
+        with Path(csv_path).open(newline="", encoding="utf-8") as csv_file:
+            return self.upsert_many(list(csv.DictReader(csv_file)))
+
+    def export_csv(self, csv_path: str | Path, parser: str | None = None) -> Path:
+        csv_path = Path(csv_path)
+        csv_path.parent.mkdir(parents=True, exist_ok=True)
+        with csv_path.open("w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=METRICS_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows(parser=parser))
+        return csv_path
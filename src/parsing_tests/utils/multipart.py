@@ -0,0 +1,187 @@
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterable
+
+import requests
+
+logger = logging.getLogger("parsing_tests.http")
+
+# Bodies smaller than this upload in well under a second; no point logging progress.
+PROGRESS_MIN_BYTES = 1024 * 1024
+
+
+@dataclass
+class UploadStats:
+    """Bytes and wall time spent sending one request body (or several, merged)."""
+
+    bytes_sent: int = 0
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def upload_seconds(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_sent / self.upload_seconds if self.upload_seconds > 0 else 0.0
+
+    @classmethod
+    def merge(cls, parts: Iterable["UploadStats"]) -> "UploadStats":
+        """Combine parallel uploads: summed bytes over the overall wall time."""
+        parts = [part for part in parts if part.started_at is not None]
+        if not parts:
+            return cls()
+        return cls(
+            bytes_sent=sum(part.bytes_sent for part in parts),
+            started_at=min(part.started_at for part in parts),  # type: ignore[type-var]
+            finished_at=max(part.finished_at or part.started_at for part in parts),  # type: ignore[type-var]
+        )
+
+    def to_metrics(self, total_seconds: float) -> dict[str, Any]:
+        """Metrics columns, splitting ``total_seconds`` into upload and server time."""
+        return {
+            "upload_bytes": self.bytes_sent,
+            "upload_seconds": f"{self.upload_seconds:.2f}",
+            "upload_bytes_per_sec": f"{self.bytes_per_second:.0f}",
+            "server_seconds": f"{max(0.0, total_seconds - self.upload_seconds):.2f}",
+        }
+
+
+class MultipartStream:
+    """
+    multipart/form-data body that streams its file part instead of buffering it.
+
+    ``requests`` sends file-like bodies by calling ``read`` in small blocks, so only
+    one block of the file is in memory at a time. ``len`` gives Content-Length and
+    ``seek(0)`` lets urllib3 rewind the body when it retries.
+    """
+
+    def __init__(
+        self,
+        fields: dict[str, str],
+        file_field: str,
+        filename: str,
+        fileobj: BinaryIO,
+        content_type: str = "application/pdf",
+        stats: UploadStats | None = None,
+        progress_step: float = 0.1,
+    ):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        preamble = b"".join(
+            (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode("utf-8")
+            for name, value in fields.items()
+        )
+        preamble += (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._preamble = preamble
+        self._epilogue = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self._file = fileobj
+        self._file_start = fileobj.tell()
+        self._file_size = fileobj.seek(0, 2) - self._file_start
+        fileobj.seek(self._file_start)
+        self.len = len(self._preamble) + self._file_size + len(self._epilogue)
+        self.filename = filename
+        self.stats = stats if stats is not None else UploadStats()
+        self._position = 0
+        self._progress_step = progress_step
+        self._next_progress = progress_step
+
+    def __len__(self) -> int:
+        return self.len
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if (offset, whence) not in ((0, 0), (0, 2)):
+            raise OSError("MultipartStream only supports rewinding or seeking to the end")
+        if whence == 2:
+            self._position = self.len
+            return self._position
+        self._position = 0
+        self._file.seek(self._file_start)
+        # A rewind means urllib3 is about to resend the body; time the new attempt only.
+        self.stats.bytes_sent = 0
+        self.stats.started_at = None
+        self.stats.finished_at = None
+        self._next_progress = self._progress_step
+        return 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self.stats.started_at is None:
+            self.stats.started_at = time.perf_counter()
+        if size is None or size < 0:
+            size = self.len - self._position
+        chunks = []
+        while size > 0 and self._position < self.len:
+            chunk = self._read_part(size)
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._position += len(chunk)
+        data = b"".join(chunks)
+        self.stats.bytes_sent = self._position
+        if self._position >= self.len and self.stats.finished_at is None:
+            self.stats.finished_at = time.perf_counter()
+        self._log_progress()
+        return data
+
+    def _read_part(self, size: int) -> bytes:
+        file_end = len(self._preamble) + self._file_size
+        if self._position < len(self._preamble):
+            return self._preamble[self._position : self._position + size]
+        if self._position < file_end:
+            chunk = self._file.read(min(size, file_end - self._position))
+            if not chunk:
+                raise OSError(f"{self.filename} shrank while it was being uploaded")
+            return chunk
+        offset = self._position - file_end
+        return self._epilogue[offset : offset + size]
+
+    def _log_progress(self) -> None:
+        if (
+            not self._progress_step
+            or self.len < PROGRESS_MIN_BYTES
+            or self._position < self._next_progress * self.len
+        ):
+            return
+        elapsed = time.perf_counter() - (self.stats.started_at or time.perf_counter())
+        logger.info(
+            "Uploading %s: %.0f%% of %.1f MB (%.1f MB/s)",
+            self.filename,
+            100.0 * self._position / self.len,
+            self.len / 1e6,
+            self._position / 1e6 / elapsed if elapsed > 0 else 0.0,
+        )
+        while self._next_progress * self.len <= self._position:
+            self._next_progress += self._progress_step
+
+
+def post_multipart(
+    session: requests.Session,
+    url: str,
+    *,
+    fields: dict[str, str],
+    filename: str,
+    fileobj: BinaryIO,
+    stats: UploadStats | None = None,
+    headers: dict[str, str] | None = None,
+    **kwargs: Any,
+) -> requests.Response:
+    """POST ``fileobj`` as the ``file`` part of a streamed multipart body."""
+    body = MultipartStream(fields, "file", filename, fileobj, stats=stats)
+    request_headers = dict(headers or {})
+    request_headers["Content-Type"] = body.content_type
+    return session.post(url, data=body, headers=request_headers, **kwargs)
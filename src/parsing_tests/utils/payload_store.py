@@ -0,0 +1,239 @@
+import gzip
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+    parquet = None
+
+
+PAYLOAD_EXTENSIONS = {
+    "json": ".json",
+    "gz": ".json.gz",
+    "zst": ".json.zst",
+    "msgpack": ".msgpack",
+}
+UNITS_TABLE_SUFFIX = ".units.parquet"
+# Stored in each units table's Parquet metadata; bump it whenever the unit
+# builders in analysis.payload_reader change, so older tables are rebuilt.
+# 2: GPT pages are split into heading-delimited sections.
+UNITS_TABLE_VERSION = "2"
+UNITS_VERSION_KEY = b"units_version"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_LEVEL = 10
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+def results_format() -> str:
+    """Payload format for new results, from RESULTS_FORMAT (json, gz, zst or msgpack)."""
+    fmt = (os.getenv("RESULTS_FORMAT") or "json").strip().lower()
+    if fmt not in PAYLOAD_EXTENSIONS:
+        raise ValueError(
+            f"Unsupported RESULTS_FORMAT '{fmt}'; expected one of {', '.join(PAYLOAD_EXTENSIONS)}"
+        )
+    _require(fmt)
+    return fmt
+
+
+def _require(fmt: str) -> None:
+    if fmt == "zst" and zstandard is None:
+        raise RuntimeError("The zst payload format requires the 'zstandard' package")
+    if fmt == "msgpack" and msgpack is None:
+        raise RuntimeError("The msgpack payload format requires the 'msgpack' package")
+
+
+def format_for_path(path: Path) -> str:
+    """Format implied by a payload file name (``.json`` when unrecognised)."""
+    name = path.name
+    for fmt, extension in PAYLOAD_EXTENSIONS.items():
+        if fmt != "json" and name.endswith(extension):
+            return fmt
+    return "json"
+
+
+def detect_format(path: Path) -> str:
+    """Format of an existing payload file, from its leading bytes."""
+    with Path(path).open("rb") as handle:
+        head = handle.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return "gz"
+    if head.startswith(ZSTD_MAGIC):
+        return "zst"
+    if head.lstrip()[:1] in (b"{", b"[") or head.startswith(b"\xef\xbb\xbf") or not head.strip():
+        return "json"
+    return "msgpack"
+
+
+@contextmanager
+def open_json_writer(target: Path, fmt: str) -> Iterator[BinaryIO]:
+    """Binary handle that stores the JSON bytes written to it as ``fmt``."""
+    if fmt == "msgpack":
+        raise ValueError("msgpack payloads cannot be written from a JSON byte stream")
+    _require(fmt)
+    if fmt == "gz":
+        with gzip.open(target, "wb", compresslevel=6) as handle:
+            yield handle  # type: ignore[misc]
+    elif fmt == "zst":
+        with target.open("wb") as raw:
+            with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False) as handle:
+                yield handle
+    else:
+        with target.open("wb") as handle:
+            yield handle
+
+
+@contextmanager
+def open_json_payload(path: Path) -> Iterator[BinaryIO]:
+    """Binary handle over the (decompressed) JSON bytes of a payload file."""
+    fmt = detect_format(path)
+    if fmt == "msgpack":
+        raise ValueError(f"{path} is msgpack, not JSON")
+    _require(fmt)
+    if fmt == "gz":
+        with gzip.open(path, "rb") as handle:
+            yield handle  # type: ignore[misc]
+    elif fmt == "zst":
+        with Path(path).open("rb") as raw:
+            with zstandard.ZstdDecompressor().stream_reader(raw) as handle:
+                yield handle
+    else:
+        with Path(path).open("rb") as handle:
+            yield handle
+
+
+def write_payload(target: Path, payload: Any, fmt: str) -> Path:
+    """Serialize ``payload`` to ``target``; plain JSON stays indented for reading by eye."""
+    _require(fmt)
+    if fmt == "msgpack":
+        target.write_bytes(msgpack.packb(payload, use_bin_type=True))
+        return target
+    indent = 2 if fmt == "json" else None
+    with open_json_writer(target, fmt) as handle:
+        handle.write(json.dumps(payload, indent=indent).encode("utf-8"))
+    return target
+
+
+def write_json_chunks(target: Path, chunks: Iterable[bytes], fmt: str) -> Path:
+    """Store a JSON body received in chunks, compressing on the fly where possible."""
+    if fmt == "msgpack":
+        # msgpack needs the decoded document, so spool the JSON first and convert it.
+        spool = target.with_name(target.name + ".json")
+        try:
+            write_json_chunks(spool, chunks, "json")
+            with spool.open("rb") as handle:
+                write_payload(target, json.load(handle), fmt)
+        finally:
+            spool.unlink(missing_ok=True)
+        return target
+    with open_json_writer(target, fmt) as handle:
+        for chunk in chunks:
+            if chunk:
+                handle.write(chunk)
+    return target
+
+
+def load_payload(path: str | Path) -> Any:
+    """Load a payload in any supported format, detected from the file contents."""
+    path = Path(path)
+    fmt = detect_format(path)
+    if fmt == "msgpack":
+        _require(fmt)
+        with path.open("rb") as handle:
+            return msgpack.unpack(handle, raw=False, strict_map_key=False)
+    with open_json_payload(path) as handle:
+        return json.load(handle)
+
+
+def convert_payload(source: Path, fmt: str) -> Path:
+    """Rewrite ``source`` as ``fmt`` next to it, removing the original."""
+    _require(fmt)
+    stem = source.name[: -len(PAYLOAD_EXTENSIONS[format_for_path(source)])]
+    target = source.with_name(stem + PAYLOAD_EXTENSIONS[fmt])
+    if target == source:
+        return source
+    partial = target.with_name(target.name + ".part")
+    try:
+        if fmt == "msgpack" or detect_format(source) == "msgpack":
+            write_payload(partial, load_payload(source), fmt)
+        else:
+            with open_json_payload(source) as reader, open_json_writer(partial, fmt) as writer:
+                shutil.copyfileobj(reader, writer, COPY_CHUNK_BYTES)
+        shutil.copystat(source, partial)  # keeps an existing units table from looking stale
+        partial.replace(target)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    source.unlink()
+    return target
+
+
+def units_table_path(payload_path: Path) -> Path:
+    """Parquet table of a payload's units, stored next to it."""
+    stem = payload_path.name[: -len(PAYLOAD_EXTENSIONS[format_for_path(payload_path)])]
+    return payload_path.with_name(stem + UNITS_TABLE_SUFFIX)
+
+
+def write_units_table(target: Path, rows: Iterable[dict[str, Any]]) -> Path:
+    """Write unit rows (unit_id, page, text) as a zstd-compressed Parquet file."""
+    if pyarrow is None:
+        raise RuntimeError("Units tables require the 'pyarrow' package")
+    schema = pyarrow.schema(
+        [
+            ("unit_id", pyarrow.int64()),
+            ("page", pyarrow.int64()),
+            ("text", pyarrow.string()),
+        ],
+        metadata={UNITS_VERSION_KEY: UNITS_TABLE_VERSION.encode()},
+    )
+    columns: dict[str, list[Any]] = {name: [] for name in schema.names}
+    for row in rows:
+        for name in schema.names:
+            columns[name].append(row.get(name))
+    parquet.write_table(pyarrow.table(columns, schema=schema), target, compression="zstd")
+    return target
+
+
+def _usable_units_table(payload_path: Path) -> Path | None:
+    table_path = units_table_path(payload_path)
+    if parquet is None or not table_path.exists():
+        return None
+    if table_path.stat().st_mtime < payload_path.stat().st_mtime:
+        return None  # stale: the payload was rewritten after the table
+    metadata = parquet.read_schema(table_path).metadata or {}
+    if metadata.get(UNITS_VERSION_KEY) != UNITS_TABLE_VERSION.encode():
+        return None  # built by an older unit builder
+    return table_path
+
+
+def read_units_table(payload_path: Path) -> list[dict[str, Any]] | None:
+    """Rows of the payload's units table, or None when there is no usable one."""
+    table_path = _usable_units_table(payload_path)
+    if table_path is None:
+        return None
+    return parquet.read_table(table_path).to_pylist()
+
+
+def units_table_state(payload_path: Path) -> str:
+    """``version:mtime_ns`` of the payload's usable units table, '' when there is none."""
+    table_path = _usable_units_table(payload_path)
+    if table_path is None:
+        return ""
+    return f"{UNITS_TABLE_VERSION}:{table_path.stat().st_mtime_ns}"
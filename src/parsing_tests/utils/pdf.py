@@ -0,0 +1,18 @@
+from functools import lru_cache
+from pathlib import Path
+
+import pymupdf
+
+
+@lru_cache(maxsize=None)
+def _page_count(pdf_path: str, mtime_ns: int) -> int:
+    with pymupdf.open(pdf_path) as document:
+        return document.page_count
+
+
+def pdf_page_count(pdf_path: str | Path) -> int | None:
+    path = Path(str(pdf_path).strip())
+    try:
+        return _page_count(str(path), path.stat().st_mtime_ns)
+    except Exception:
+        return None
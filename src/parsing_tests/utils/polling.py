@@ -0,0 +1,107 @@
+import random
+import time
+from pathlib import Path
+from statistics import median
+from typing import Any, Iterable
+
+from .pdf import pdf_page_count
+
+
+class PollSchedule:
+    """
+    Adaptive delays between result polls for one asynchronous job.
+
+    Without a prediction the schedule starts at ``initial`` seconds and backs off
+    exponentially (with jitter) up to ``max_interval``. With ``expected_seconds`` it
+    first waits for the predicted completion window (at most half the prediction
+    per sleep), then restarts the fast backoff around it. ``timeout`` bounds the
+    total wait.
+    """
+
+    def __init__(
+        self,
+        expected_seconds: float | None = None,
+        *,
+        initial: float = 1.0,
+        factor: float = 1.6,
+        max_interval: float = 10.0,
+        jitter: float = 0.2,
+        lead: float = 0.75,
+        timeout: float | None = None,
+    ):
+        self.expected_seconds = expected_seconds
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.lead = lead
+        self.timeout = timeout
+        self.started_at = time.perf_counter()
+        self.attempts = 0
+        self.poll_latency: float | None = None
+        self._last_poll_at = self.started_at
+        self._backoff_step = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def expired(self) -> bool:
+        return self.timeout is not None and self.elapsed >= self.timeout
+
+    def record_poll(self, finished: bool) -> None:
+        """Count a poll; on the finishing poll, keep the gap since the previous one."""
+        now = time.perf_counter()
+        self.attempts += 1
+        if finished:
+            # The job ended somewhere in this gap, so it bounds the latency polling added.
+            self.poll_latency = now - self._last_poll_at
+        self._last_poll_at = now
+
+    def next_delay(self) -> float:
+        window_start = (self.expected_seconds or 0.0) * self.lead
+        remaining = window_start - self.elapsed
+        if remaining > self.initial:
+            delay = min(remaining, max(self.max_interval, window_start / 2))
+        else:
+            delay = min(self.max_interval, self.initial * self.factor**self._backoff_step)
+            self._backoff_step += 1
+        delay *= random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+        if self.timeout is not None:
+            delay = min(delay, max(0.0, self.timeout - self.elapsed))
+        return delay
+
+
+def estimate_duration(
+    pdf_path: str | Path,
+    history: Iterable[dict[str, Any]],
+) -> float | None:
+    """
+    Predict a job's duration from past metrics rows of the same parser.
+
+    Previous runs of the same PDF win; otherwise the median seconds-per-page of
+    past runs is scaled by this PDF's page count. Returns None without history.
+    """
+    pdf_key = str(pdf_path).strip()
+    same_pdf: list[float] = []
+    per_page: list[float] = []
+    for row in history:
+        try:
+            duration = float(row.get("duration_seconds") or 0)
+        except ValueError:
+            continue
+        if duration <= 0 or (row.get("status") or "").lower() in {"failed", "error"}:
+            continue
+        row_pdf = (row.get("pdf_path") or "").strip()
+        if row_pdf == pdf_key:
+            same_pdf.append(duration)
+        pages = pdf_page_count(row_pdf)
+        if pages:
+            per_page.append(duration / pages)
+
+    if same_pdf:
+        return median(same_pdf)
+    page_count = pdf_page_count(pdf_key)
+    if per_page and page_count:
+        return median(per_page) * page_count
+    return None
@@ -1,30 +1,225 @@
-import csv
-import json
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
+
+from .metrics_store import METRICS_FIELDS, MetricsStore
+from .payload_store import (
+    PAYLOAD_EXTENSIONS,
+    detect_format,
+    format_for_path,
+    load_payload,
+    open_json_payload,
+    results_format,
+    write_json_chunks,
+    write_payload,
+)
+from .pdf import pdf_page_count
+from .results_catalog import ResultsCatalog, pdf_hash
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 
 RESULTS_DIR = Path("data/results")
 RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def save_json_payload(
+# Arrays whose length is the chunk count, and keys holding the server-side execution
+# time, in the same order of precedence as _infer_chunk_count/_infer_execution_time.
+CHUNK_ARRAYS = ("result.content", "chunks", "return.chunks", "return_dict.result.blocks")
+EXECUTION_TIME_KEYS = ("result.execution_time", "meta.execution_time", "return.execution_time")
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+_metrics_store: MetricsStore | None = None
+_results_catalog: ResultsCatalog | None = None
+_metrics_lock = threading.Lock()
+# Payload names handed out by this process, so concurrent batch runs never share one.
+_reserved_payloads: set[Path] = set()
+
+
+def payload_path(
     parser_name: str,
     pdf_path: str | Path,
-    payload: dict[str, Any],
     experiment: str | None = None,
 ) -> Path:
+    """
+    New, unused payload file name; the extension follows RESULTS_FORMAT.
+
+    Names carry a short hash of the PDF, so same-named PDFs from different folders
+    never collide, and a ``_2``, ``_3``... counter when the name is already taken
+    (on disk or by another run of this process) within the same second.
+    """
     pdf_path = _normalize_path_value(pdf_path)
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     pdf_stem = Path(pdf_path).stem.replace(" ", "_")
     suffix = f"_{_sanitize(experiment)}" if experiment else ""
-    filename = f"{parser_name.lower()}_{pdf_stem}_{timestamp}{suffix}.json"
-    target = RESULTS_DIR / filename
-    target.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    extension = PAYLOAD_EXTENSIONS[results_format()]
+    base = f"{parser_name.lower()}_{pdf_stem}{_pdf_tag(pdf_path)}_{timestamp}{suffix}"
+    with _metrics_lock:
+        target = RESULTS_DIR / f"{base}{extension}"
+        counter = 1
+        while (
+            target in _reserved_payloads
+            or target.exists()
+            or target.with_name(target.name + ".part").exists()
+        ):
+            counter += 1
+            target = RESULTS_DIR / f"{base}_{counter}{extension}"
+        _reserved_payloads.add(target)
+    return target
+
+
+def save_json_payload(
+    parser_name: str,
+    pdf_path: str | Path,
+    payload: dict[str, Any],
+    experiment: str | None = None,
+) -> Path:
+    target = payload_path(parser_name, pdf_path, experiment)
+    write_payload(target, payload, format_for_path(target))
+    record_result(parser_name, pdf_path, target, experiment, _infer_chunk_count(payload))
+    return target
+
+
+def save_stream_payload(target: Path, chunks: Iterable[bytes]) -> Path:
+    """
+    Write a JSON response body to ``target`` chunk by chunk, as received.
+
+    The body is stored in the format implied by the file name (compressed on the
+    fly for gz/zst). It goes to a ``.part`` file that is renamed into place once
+    complete, so an interrupted download never leaves a truncated payload behind.
+    """
+    partial = target.with_name(target.name + ".part")
+    try:
+        write_json_chunks(partial, chunks, format_for_path(target))
+        partial.replace(target)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
     return target
 
 
+def summarize_payload(source: Path | dict[str, Any]) -> dict[str, Any]:
+    """
+    Status, chunk count and execution time of a payload, without keeping it around.
+
+    JSON files (compressed or not) are scanned incrementally with ``ijson`` when it
+    is installed, so only the summary is ever held in memory; otherwise, and for
+    msgpack, they are loaded once. ``has_result`` tells whether a non-empty
+    top-level ``result`` is present.
+    """
+    if isinstance(source, dict):
+        return _summary_from_payload(source)
+    if ijson is None or detect_format(Path(source)) == "msgpack":
+        return _summary_from_payload(load_payload(source))
+    with open_json_payload(Path(source)) as handle:
+        return _summary_from_events(ijson.parse(handle, use_float=True))
+
+
+def _summary_from_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "status": payload.get("status") or payload.get("state") or "",
+        "chunk_count": _infer_chunk_count(payload),
+        "execution_time": _infer_execution_time(payload),
+        "has_result": payload.get("result") not in (None, ""),
+    }
+
+
+def _summary_from_events(events: Iterable[tuple[str, str, Any]]) -> dict[str, Any]:
+    counts: dict[str, int] = {}
+    scalars: dict[str, Any] = {}
+    item_prefixes = {f"{prefix}.item": prefix for prefix in CHUNK_ARRAYS}
+    scalar_keys = {"status", "state", *EXECUTION_TIME_KEYS}
+    has_result = False
+    for prefix, event, value in events:
+        if event in ("map_key", "end_map", "end_array"):
+            continue
+        if prefix == "result":
+            has_result = event in ("start_map", "start_array") or value not in (None, "")
+        if event == "start_array" and prefix in CHUNK_ARRAYS:
+            counts.setdefault(prefix, 0)
+        elif prefix in item_prefixes and item_prefixes[prefix] in counts:
+            counts[item_prefixes[prefix]] += 1
+        elif prefix in scalar_keys and event not in ("start_map", "start_array"):
+            scalars[prefix] = value
+
+    chunk_count = next((counts[prefix] for prefix in CHUNK_ARRAYS if prefix in counts), 0)
+    execution_time = next(
+        (scalars[key] for key in EXECUTION_TIME_KEYS if scalars.get(key) is not None), None
+    )
+    return {
+        "status": scalars.get("status") or scalars.get("state") or "",
+        "chunk_count": chunk_count,
+        "execution_time": str(execution_time) if execution_time is not None else "",
+        "has_result": has_result,
+    }
+
+
+def _pdf_tag(pdf_path: str | Path) -> str:
+    """``_<first 8 hex digits of the PDF's SHA-256>``, or '' if the PDF cannot be read."""
+    digest = pdf_hash(pdf_path)
+    return f"_{digest[:8]}" if digest else ""
+
+
+def journal_path(
+    parser_name: str,
+    pdf_path: str | Path,
+    experiment: str | None = None,
+) -> Path:
+    """
+    Stable per-document checkpoint path, so a resumed run finds its journal.
+
+    A short hash of the PDF's content keeps same-named PDFs from different
+    folders (or an edited PDF) from sharing a journal.
+    """
+    pdf_path = _normalize_path_value(pdf_path)
+    pdf_stem = Path(pdf_path).stem.replace(" ", "_")
+    suffix = f"_{_sanitize(experiment)}" if experiment else ""
+    filename = f"{parser_name.lower()}_{pdf_stem}{_pdf_tag(pdf_path)}{suffix}.jsonl"
+    return RESULTS_DIR / "journals" / filename
+
+
+def results_catalog() -> ResultsCatalog:
+    """Index of the payloads saved in the results directory."""
+    global _results_catalog
+    with _metrics_lock:
+        if _results_catalog is None:
+            _results_catalog = ResultsCatalog(RESULTS_DIR / "catalog.db")
+        return _results_catalog
+
+
+def record_result(
+    parser_name: str,
+    pdf_path: str | Path,
+    target: Path,
+    experiment: str | None = None,
+    unit_count: int | None = None,
+) -> None:
+    """Catalog a payload written outside ``save_json_payload`` (e.g. a streamed one)."""
+    results_catalog().record(
+        parser_name.lower(),
+        _normalize_path_value(pdf_path),
+        target,
+        label=experiment,
+        page_count=pdf_page_count(pdf_path),
+        unit_count=unit_count,
+    )
+
+
+def metrics_store() -> MetricsStore:
+    """The results directory's metrics database, importing ``metrics.csv`` on first use."""
+    global _metrics_store
+    with _metrics_lock:
+        if _metrics_store is None:
+            _metrics_store = MetricsStore(
+                RESULTS_DIR / "metrics.db", legacy_csv=RESULTS_DIR / "metrics.csv"
+            )
+        return _metrics_store
+
+
 def append_metrics(
     parser_name: str,
     pdf_path: str | Path,
@@ -35,20 +230,6 @@ def append_metrics(
     extra: dict[str, Any] | None = None,
 ) -> Path:
     pdf_path = _normalize_path_value(pdf_path)
-    csv_path = RESULTS_DIR / "metrics.csv"
-    fieldnames = [
-        "timestamp",
-        "experiment",
-        "parser",
-        "parser_env",
-        "pdf_path",
-        "status",
-        "duration_seconds",
-        "chunk_count",
-        "execution_time",
-        "notes",
-    ]
-
     row = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "experiment": experiment or "",
@@ -63,17 +244,17 @@ def append_metrics(
     }
     if extra:
         for key, value in extra.items():
-            if key in fieldnames:
+            if key in METRICS_FIELDS:
                 row[key] = value
 
-    _ensure_header(csv_path, fieldnames)
-    write_header = not csv_path.exists()
-    with csv_path.open("a", newline="", encoding="utf-8") as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-        if write_header:
-            writer.writeheader()
-        writer.writerow(row)
-    return csv_path
+    store = metrics_store()
+    store.upsert(row)
+    return store.path
+
+
+def read_metrics(parser_name: str | None = None) -> list[dict[str, str]]:
+    """Recorded runs, oldest first, optionally limited to one parser."""
+    return metrics_store().rows(parser=parser_name)
 
 
 def _infer_chunk_count(payload: dict[str, Any]) -> int:
@@ -85,6 +266,9 @@ def _infer_chunk_count(payload: dict[str, Any]) -> int:
     sherpa_return = payload.get("return")
     if isinstance(sherpa_return, dict) and isinstance(sherpa_return.get("chunks"), list):
         return len(sherpa_return["chunks"])
+    sherpa_result = (payload.get("return_dict") or {}).get("result")
+    if isinstance(sherpa_result, dict) and isinstance(sherpa_result.get("blocks"), list):
+        return len(sherpa_result["blocks"])
     return 0
 
 
@@ -100,24 +284,6 @@ def _infer_execution_time(payload: dict[str, Any]) -> str:
     return str(exec_time) if exec_time is not None else ""
 
 
-def _ensure_header(csv_path: Path, fieldnames: list[str]) -> None:
-    if not csv_path.exists():
-        return
-    with csv_path.open(newline="", encoding="utf-8") as csv_file:
-        reader = csv.DictReader(csv_file)
-        existing_fields = reader.fieldnames or []
-        if existing_fields == fieldnames:
-            return
-        rows = list(reader)
-
-    with csv_path.open("w", newline="", encoding="utf-8") as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            new_row = {key: row.get(key, "") for key in fieldnames}
-            writer.writerow(new_row)
-
-
 def _sanitize(value: str | None) -> str:
     if not value:
         return ""
@@ -0,0 +1,173 @@
+import hashlib
+import sqlite3
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+BUSY_TIMEOUT_MS = 30_000
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    parser: str
+    pdf_path: str
+    pdf_hash: str
+    label: str
+    page_count: int | None
+    unit_count: int | None
+    size_bytes: int
+    payload_path: str
+    created_at: str
+
+
+ENTRY_FIELDS = list(CatalogEntry.__dataclass_fields__)
+
+
+@lru_cache(maxsize=None)
+def _file_sha256(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(HASH_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_sha256(path: str | Path) -> str:
+    """SHA-256 of a file's bytes (memoized per path, mtime and size); '' if unreadable."""
+    path = Path(str(path).strip())
+    try:
+        stat = path.stat()
+        return _file_sha256(str(path), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return ""
+
+
+def pdf_hash(pdf_path: str | Path) -> str:
+    return file_sha256(pdf_path)
+
+
+class ResultsCatalog:
+    """
+    SQLite index of saved parser payloads, one row per payload file.
+
+    Rows are keyed by ``payload_path``; documents are identified by ``pdf_hash``
+    so a PDF that moved or was renamed still matches its earlier runs.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "id INTEGER PRIMARY KEY, parser TEXT NOT NULL, pdf_path TEXT NOT NULL, "
+                "pdf_hash TEXT NOT NULL, label TEXT NOT NULL DEFAULT '', page_count INTEGER, "
+                "unit_count INTEGER, size_bytes INTEGER NOT NULL, "
+                "payload_path TEXT NOT NULL UNIQUE, created_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_latest "
+                "ON results (parser, pdf_hash, created_at)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_label ON results (label)")
+            conn.commit()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000)) as conn:
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            yield conn
+
+    def record(
+        self,
+        parser: str,
+        pdf_path: str | Path,
+        payload_path: str | Path,
+        *,
+        label: str | None = None,
+        page_count: int | None = None,
+        unit_count: int | None = None,
+        created_at: str | None = None,
+    ) -> CatalogEntry:
+        """Add (or refresh) the entry for ``payload_path``."""
+        payload_path = Path(payload_path)
+        entry = CatalogEntry(
+            parser=parser,
+            pdf_path=str(pdf_path).strip(),
+            pdf_hash=pdf_hash(pdf_path),
+            label=label or "",
+            page_count=page_count,
+            unit_count=unit_count,
+            size_bytes=payload_path.stat().st_size,
+            payload_path=str(payload_path),
+            created_at=created_at or datetime.now(timezone.utc).isoformat(),
+        )
+        columns = ", ".join(ENTRY_FIELDS)
+        placeholders = ", ".join("?" for _ in ENTRY_FIELDS)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in ENTRY_FIELDS)
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO results ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (payload_path) DO UPDATE SET {updates}",
+                [getattr(entry, name) for name in ENTRY_FIELDS],
+            )
+            conn.commit()
+        return entry
+
+    def move(self, old_path: str | Path, new_path: str | Path) -> None:
+        """Point an entry at a payload that was converted or moved."""
+        new_path = Path(new_path)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE results SET payload_path = ?, size_bytes = ? WHERE payload_path = ?",
+                (str(new_path), new_path.stat().st_size, str(old_path)),
+            )
+            conn.commit()
+
+    def entries(
+        self,
+        parser: str | None = None,
+        label: str | None = None,
+        pdf_hash: str | None = None,
+    ) -> list[CatalogEntry]:
+        """Entries oldest first, optionally filtered."""
+        where, params = self._filters(parser, label, pdf_hash)
+        return self._query(
+            f"SELECT {', '.join(ENTRY_FIELDS)} FROM results{where} ORDER BY created_at, id",
+            params,
+        )
+
+    def latest_per_pdf(
+        self,
+        parser: str,
+        label: str | None = None,
+    ) -> list[CatalogEntry]:
+        """The most recent ``parser`` payload of each PDF, ordered by PDF path."""
+        where, params = self._filters(parser, label, None)
+        return self._query(
+            f"SELECT {', '.join(ENTRY_FIELDS)} FROM ("
+            f"SELECT *, ROW_NUMBER() OVER ("
+            # PDFs that could not be hashed fall back to grouping by path.
+            f"PARTITION BY CASE WHEN pdf_hash = '' THEN pdf_path ELSE pdf_hash END "
+            f"ORDER BY created_at DESC, id DESC) AS rank "
+            f"FROM results{where}) WHERE rank = 1 ORDER BY pdf_path",
+            params,
+        )
+
+    @staticmethod
+    def _filters(
+        parser: str | None, label: str | None, pdf_hash: str | None
+    ) -> tuple[str, list[str]]:
+        filters = {"parser": parser, "label": label, "pdf_hash": pdf_hash}
+        clauses = [f"{name} = ?" for name, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _query(self, sql: str, params: list[str]) -> list[CatalogEntry]:
+        with self._connect() as conn:
+            return [CatalogEntry(*record) for record in conn.execute(sql, params)]